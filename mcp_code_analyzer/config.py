@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
 from typing import Set, Dict, Any
 import logging
+import os
 
 # Configure logging
 logging.basicConfig(
@@ -24,9 +25,14 @@ class SystemConfig:
 
     # Cache settings
     ENABLE_CACHE: bool = True
-    MAX_CACHE_SIZE: int = 100  # Maximum number of cached results
+    MAX_CACHE_SIZE: int = field(default_factory=lambda: int(
+        os.environ.get('MCP_CODE_ANALYZER_CACHE_SIZE', 100)))  # Maximum number of cached results
     CACHE_TTL: int = 3600  # Cache time-to-live in seconds
 
+    # File contents cached by content scans
+    FILE_CACHE_SIZE: int = 512
+    FILE_CACHE_TTL: int = 300
+
 @dataclass
 class AnalysisConfig:
     """Analysis-specific configuration"""
@@ -35,7 +41,8 @@ class AnalysisConfig:
     excluded_dirs: Set[str] = field(default_factory=lambda: {
         'node_modules', 'release', 'dist', 'build', '.git', '.aws', '.next',
         '__pycache__', 'venv', '.venv', 'env', '.env', 'coverage',
-        '.coverage', 'tmp', '.tmp', '.idea', '.vscode'
+        '.coverage', 'tmp', '.tmp', '.idea', '.vscode', '.hg', '.svn', '.tox',
+        '.nox', '.mypy_cache', '.pytest_cache', '.ruff_cache', 'site-packages'
     })
 
     # File types to exclude from analysis
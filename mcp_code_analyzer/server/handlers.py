@@ -2,13 +2,13 @@ import logging
 from enum import Enum
 from typing import Dict, Any, List, Optional
 from pathlib import Path
-import json
 import sys
 import mcp.types as types
 from mcp.server import Server, NotificationOptions
 from mcp.server.models import InitializationOptions
 import mcp.server.stdio
 from ..tools.manager import ToolManager
+from ..tools.base import dumps_json, shutdown_pools
 
 logger = logging.getLogger(__name__)
 __all__ = ["MCPServer", "main"]
@@ -105,7 +105,7 @@ class MCPServer:
             # Convert to string safely
             try:
                 if isinstance(encoded_result, (dict, list)):
-                    result_str = json.dumps(encoded_result, ensure_ascii=False)
+                    result_str = dumps_json(encoded_result)
                 else:
                     result_str = str(encoded_result)
                 return [types.TextContent(type="text", text=result_str)]
@@ -119,7 +119,7 @@ class MCPServer:
     async def _format_modification_result(self, result: Dict) -> List[types.TextContent]:
         """Format code modification result"""
         if "error" in result:
-            return [types.TextContent(type="text", text=json.dumps({
+            return [types.TextContent(type="text", text=dumps_json({
                 "success": False,
                 "error": result["error"]
             }))]
@@ -146,7 +146,7 @@ class MCPServer:
                 ]
             }
 
-        return [types.TextContent(type="text", text=json.dumps(formatted_result))]
+        return [types.TextContent(type="text", text=dumps_json(formatted_result))]
 
 
     async def _handle_tool_result(self, result: Any) -> List[types.TextContent]:
@@ -157,7 +157,7 @@ class MCPServer:
 
             try:
                 if isinstance(encoded_result, (dict, list)):
-                    result_str = json.dumps(encoded_result, ensure_ascii=False)
+                    result_str = dumps_json(encoded_result)
                 else:
                     result_str = str(encoded_result)
                 return [types.TextContent(type="text", text=result_str)]
@@ -185,38 +185,38 @@ class MCPServer:
     def _setup_handlers(self):
         """Setup all server handlers"""
 
+        # analyze_paths is fixed after startup, so build these listings once
+        resources = [
+            types.Resource(
+                uri=types.AnyUrl(f"memo://insights/{path.name}"),
+                name=f"Analysis for {path.name}",
+                description=f"Analysis results for {path}",
+                mimeType="text/plain"
+            )
+            for path in self.analyze_paths
+        ]
+        prompts = [
+            types.Prompt(
+                name=f"analyze-{path.name}",
+                description=f"Analyze code in {path}",
+                arguments=[
+                    types.PromptArgument(
+                        name="tool",
+                        description="Analysis tool to use",
+                        required=True
+                    )
+                ]
+            )
+            for path in self.analyze_paths
+        ]
+
         @self.server.list_resources()
         async def handle_list_resources() -> List[types.Resource]:
-            resources = []
-            for path in self.analyze_paths:
-                resources.append(
-                    types.Resource(
-                        uri=types.AnyUrl(f"memo://insights/{Path(path).name}"),
-                        name=f"Analysis for {Path(path).name}",
-                        description=f"Analysis results for {path}",
-                        mimeType="text/plain"
-                    )
-                )
-            return resources
+            return list(resources)
 
         @self.server.list_prompts()
         async def handle_list_prompts() -> List[types.Prompt]:
-            prompts = []
-            for path in self.analyze_paths:
-                prompts.append(
-                    types.Prompt(
-                        name=f"analyze-{Path(path).name}",
-                        description=f"Analyze code in {path}",
-                        arguments=[
-                            types.PromptArgument(
-                                name="tool",
-                                description="Analysis tool to use",
-                                required=True
-                            )
-                        ]
-                    )
-                )
-            return prompts
+            return list(prompts)
 
         @self.server.list_tools()
         async def handle_list_tools() -> List[types.Tool]:
@@ -273,7 +273,8 @@ class MCPServer:
                                     "end": {"type": "number"}
                                 }
                             },
-                            "stream_operation": {"type": "string", "enum": ["start", "write", "finish"]}
+                            "stream_operation": {"type": "string", "enum": ["start", "write", "finish"]},
+                            "buffered": {"type": "boolean"}
                         },
                         "required": ["operation", "path"]
                     }
@@ -501,7 +502,8 @@ class MCPServer:
                         "type": "object",
                         "properties": {
                             "pattern": {"type": "string"},
-                            "replacement": {"type": "string"}
+                            "replacement": {"type": "string"},
+                            "max_preview_chars": {"type": "integer", "minimum": 64}
                         },
                         "required": ["pattern", "replacement"]
                     }
@@ -522,7 +524,7 @@ class MCPServer:
                         return [types.TextContent(type="text", text=f"Tool {name} not found")]
 
                     result = await tool.execute(arguments)
-                    return [types.TextContent(type="text", text=json.dumps(result, ensure_ascii=False))]
+                    return [types.TextContent(type="text", text=dumps_json(result))]
 
                 # Handle paths for other tools
                 if "file_path" in arguments:
@@ -536,7 +538,7 @@ class MCPServer:
                 if isinstance(result, dict) and "error" in result:
                     return [types.TextContent(type="text", text=str(result["error"]))]
 
-                return [types.TextContent(type="text", text=json.dumps(result, ensure_ascii=False))]
+                return [types.TextContent(type="text", text=dumps_json(result))]
 
             except Exception as e:
                 logger.error(f"Error executing tool {name}: {e}", exc_info=True)
@@ -577,6 +579,8 @@ class MCPServer:
             except Exception as e:
                 logger.error(f"Server error: {e}", exc_info=True)
                 raise
+            finally:
+                shutdown_pools()
 
 async def main(analyze_paths: List[str]):
     """Main entry point for the MCP server"""
@@ -1,21 +1,34 @@
 import ast
 import logging
+import os
 from pathlib import Path
 from typing import Dict, Any, List
-from .base import BaseTool ,safe_read_file
-import networkx as nx
+from .base import (BaseTool, iter_module_imports, load_parsed_file, map_in_process_pool,
+                   parse_source)
+from .graph import DependencyGraph
+from .persistent_cache import file_signature, metrics_cache
 import logging
 import ast
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Set
+from typing import Dict, Any, FrozenSet, List, Optional, Set, Tuple
 from datetime import datetime
 import re
+import sys
+from array import array
 import tokenize
 import io
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Top-level names of every standard library module for the running interpreter
+_STDLIB_MODULES = frozenset(sys.stdlib_module_names)
+
+def _read_python_source(path: Path) -> str:
+    """Read a Python file honouring its PEP 263 encoding declaration"""
+    with tokenize.open(path) as f:
+        return f.read()
+
 class CodeStructureAnalyzer(BaseTool):
     """Analyze code structure and architecture"""
 
@@ -47,17 +60,6 @@ class CodeStructureAnalyzer(BaseTool):
             logger.error(f"Error analyzing code structure: {e}")
             return {"error": str(e)}
 
-    def _should_skip(self, path: Path) -> bool:
-        """Check if path should be skipped"""
-        try:
-            if any(excluded in path.parts for excluded in self.analysis_config.excluded_dirs):
-                return True
-            if path.is_file() and any(path.name.endswith(ext) for ext in self.analysis_config.excluded_files):
-                return True
-            return False
-        except:
-            return True
-
     async def _analyze_structure(self, path: Path) -> Dict[str, Any]:
         """Analyze code structure while maintaining existing path handling"""
         structure = {
@@ -71,47 +73,46 @@ class CodeStructureAnalyzer(BaseTool):
             if isinstance(path, str):
                 path = Path(path)
 
-            for py_file in path.rglob('*.py'):
-                if not self._should_skip(py_file):
-                    content = safe_read_file(str(py_file))
-                    if not content:
-                        continue
-
-                    try:
-                        tree = ast.parse(content)
-                        module_info = {
-                            "name": py_file.stem,
-                            "path": str(py_file.relative_to(path) if path.exists() else py_file),
-                            "classes": [],
-                            "functions": []
-                        }
+            for py_file in self._python_paths(path):
+                parsed = self._get_parsed(py_file)
+                if not parsed:
+                    continue
+                _, tree = parsed
+
+                try:
+                    module_info = {
+                        "name": py_file.stem,
+                        "path": str(py_file.relative_to(path) if path.exists() else py_file),
+                        "classes": [],
+                        "functions": []
+                    }
+
+                    for node in ast.walk(tree):
+                        if isinstance(node, ast.ClassDef):
+                            class_info = {
+                                "name": node.name,
+                                "line": node.lineno,
+                                "methods": [m.name for m in node.body if isinstance(m, ast.FunctionDef)],
+                                "bases": [b.id for b in node.bases if isinstance(b, ast.Name)]
+                            }
+                            module_info["classes"].append(class_info)
+                            structure["classes"].append(class_info)
 
-                        for node in ast.walk(tree):
-                            if isinstance(node, ast.ClassDef):
-                                class_info = {
+                        elif isinstance(node, ast.FunctionDef):
+                            if not isinstance(node.parent, ast.ClassDef):
+                                func_info = {
                                     "name": node.name,
                                     "line": node.lineno,
-                                    "methods": [m.name for m in node.body if isinstance(m, ast.FunctionDef)],
-                                    "bases": [b.id for b in node.bases if isinstance(b, ast.Name)]
+                                    "args": len(node.args.args),
+                                    "module": module_info["name"]
                                 }
-                                module_info["classes"].append(class_info)
-                                structure["classes"].append(class_info)
-
-                            elif isinstance(node, ast.FunctionDef):
-                                if not isinstance(node.parent, ast.ClassDef):
-                                    func_info = {
-                                        "name": node.name,
-                                        "line": node.lineno,
-                                        "args": len(node.args.args),
-                                        "module": module_info["name"]
-                                    }
-                                    module_info["functions"].append(func_info)
-                                    structure["functions"].append(func_info)
-
-                        structure["modules"].append(module_info)
-                    except Exception as e:
-                        logger.error(f"Error parsing {py_file}: {e}")
-                        continue
+                                module_info["functions"].append(func_info)
+                                structure["functions"].append(func_info)
+
+                    structure["modules"].append(module_info)
+                except Exception as e:
+                    logger.error(f"Error parsing {py_file}: {e}")
+                    continue
 
             # Build hierarchy
             structure["hierarchy"] = self._build_hierarchy(structure["classes"])
@@ -140,47 +141,46 @@ class CodeStructureAnalyzer(BaseTool):
         total_complexity = 0
 
         try:
-            for py_file in path.rglob('*.py'):
-                if not self._should_skip(py_file):
-                    content = safe_read_file(str(py_file))
-                    if not content:
-                        continue
+            for py_file in self._python_paths(path):
+                parsed = self._get_parsed(py_file)
+                if not parsed:
+                    continue
+                content, tree = parsed
 
-                    file_count += 1
-                    lines = content.splitlines()
-                    metrics["total_lines"] += len(lines)
-
-                    # Count different types of lines
-                    for line in lines:
-                        stripped = line.strip()
-                        if stripped and not stripped.startswith('#'):
-                            metrics["code_lines"] += 1
-                        elif stripped.startswith('#'):
-                            metrics["comment_lines"] += 1
-
-                    # Analyze AST
-                    try:
-                        tree = ast.parse(content)
-                        module_complexity = 0
-
-                        for node in ast.walk(tree):
-                            if isinstance(node, ast.ClassDef):
-                                metrics["class_count"] += 1
-                                module_complexity += len(node.body)
-
-                            elif isinstance(node, ast.FunctionDef):
-                                metrics["function_count"] += 1
-                                module_complexity += len(node.body)
-
-                        metrics["complexity"]["modules"][py_file.stem] = module_complexity
-                        total_complexity += module_complexity
-                        metrics["complexity"]["highest"] = max(
-                            metrics["complexity"]["highest"],
-                            module_complexity
-                        )
-
-                    except Exception as e:
-                        logger.error(f"Error analyzing metrics for {py_file}: {e}")
+                file_count += 1
+                lines = content.splitlines()
+                metrics["total_lines"] += len(lines)
+
+                # Count different types of lines
+                for line in lines:
+                    stripped = line.strip()
+                    if stripped and not stripped.startswith('#'):
+                        metrics["code_lines"] += 1
+                    elif stripped.startswith('#'):
+                        metrics["comment_lines"] += 1
+
+                # Analyze AST
+                try:
+                    module_complexity = 0
+
+                    for node in ast.walk(tree):
+                        if isinstance(node, ast.ClassDef):
+                            metrics["class_count"] += 1
+                            module_complexity += len(node.body)
+
+                        elif isinstance(node, ast.FunctionDef):
+                            metrics["function_count"] += 1
+                            module_complexity += len(node.body)
+
+                    metrics["complexity"]["modules"][py_file.stem] = module_complexity
+                    total_complexity += module_complexity
+                    metrics["complexity"]["highest"] = max(
+                        metrics["complexity"]["highest"],
+                        module_complexity
+                    )
+
+                except Exception as e:
+                    logger.error(f"Error analyzing metrics for {py_file}: {e}")
 
             if file_count > 0:
                 metrics["complexity"]["average"] = total_complexity / file_count
@@ -199,45 +199,44 @@ class CodeStructureAnalyzer(BaseTool):
         }
 
         # Create dependency graph
-        graph = nx.DiGraph()
+        graph = DependencyGraph()
 
         try:
-            for py_file in path.rglob('*.py'):
-                if not self._should_skip(py_file):
-                    content = safe_read_file(str(py_file))
-                    if not content:
-                        continue
-
-                    module_name = py_file.stem
-                    deps["imports"][module_name] = []
-
-                    try:
-                        tree = ast.parse(content)
-                        for node in ast.walk(tree):
-                            if isinstance(node, ast.Import):
-                                for name in node.names:
-                                    deps["imports"][module_name].append({
-                                        "name": name.name,
-                                        "alias": name.asname,
-                                        "type": "direct"
-                                    })
-                                    graph.add_edge(module_name, name.name)
-
-                            elif isinstance(node, ast.ImportFrom):
-                                if node.module:
-                                    deps["imports"][module_name].append({
-                                        "name": node.module,
-                                        "imports": [n.name for n in node.names],
-                                        "type": "from"
-                                    })
-                                    graph.add_edge(module_name, node.module)
+            for py_file in self._python_paths(path):
+                parsed = self._get_parsed(py_file)
+                if not parsed:
+                    continue
+                _, tree = parsed
 
-                    except Exception as e:
-                        logger.error(f"Error analyzing dependencies for {py_file}: {e}")
+                module_name = py_file.stem
+                deps["imports"][module_name] = []
+
+                try:
+                    for node in iter_module_imports(tree):
+                        if isinstance(node, ast.Import):
+                            for name in node.names:
+                                deps["imports"][module_name].append({
+                                    "name": name.name,
+                                    "alias": name.asname,
+                                    "type": "direct"
+                                })
+                                graph.add_edge(module_name, name.name)
+
+                        elif isinstance(node, ast.ImportFrom):
+                            if node.module:
+                                deps["imports"][module_name].append({
+                                    "name": node.module,
+                                    "imports": [n.name for n in node.names],
+                                    "type": "from"
+                                })
+                                graph.add_edge(module_name, node.module)
+
+                except Exception as e:
+                    logger.error(f"Error analyzing dependencies for {py_file}: {e}")
 
             # Find dependency cycles
             try:
-                cycles = list(nx.simple_cycles(graph))
+                cycles = graph.cycles()
                 deps["cycles"] = [{"modules": cycle} for cycle in cycles]
             except Exception as e:
                 logger.error(f"Error finding dependency cycles: {e}")
@@ -245,8 +244,8 @@ class CodeStructureAnalyzer(BaseTool):
             # Convert graph to dependency dict
             for node in graph.nodes():
                 deps["dependencies"][node] = {
-                    "imports": list(graph.successors(node)),
-                    "imported_by": list(graph.predecessors(node))
+                    "imports": graph.successors(node),
+                    "imported_by": graph.predecessors(node)
                 }
 
         except Exception as e:
@@ -264,39 +263,37 @@ class CodeStructureAnalyzer(BaseTool):
         }
 
         try:
-            for py_file in path.rglob('*.py'):
-                if not self._should_skip(py_file):
-                    content = safe_read_file(str(py_file))
-                    if not content:
-                        continue
-
-                    try:
-                        tree = ast.parse(content)
-
-                        # Analyze interfaces (abstract classes)
-                        for node in ast.walk(tree):
-                            if isinstance(node, ast.ClassDef):
-                                if any(isinstance(child, ast.FunctionDef) and
-                                       isinstance(child.body[0], ast.Pass)
-                                       for child in node.body):
-                                    architecture["interfaces"].append({
-                                        "name": node.name,
-                                        "file": str(py_file.relative_to(path)),
-                                        "methods": [m.name for m in node.body
-                                                    if isinstance(m, ast.FunctionDef)]
-                                    })
+            for py_file in self._python_paths(path):
+                parsed = self._get_parsed(py_file)
+                if not parsed:
+                    continue
+                _, tree = parsed
 
-                                # Detect common patterns
-                                if any(base.id == 'ABC' for base in node.bases
-                                       if isinstance(base, ast.Name)):
-                                    architecture["patterns"].append({
-                                        "type": "abstract_class",
-                                        "name": node.name,
-                                        "file": str(py_file.relative_to(path))
-                                    })
+                try:
+                    # Analyze interfaces (abstract classes)
+                    for node in ast.walk(tree):
+                        if isinstance(node, ast.ClassDef):
+                            if any(isinstance(child, ast.FunctionDef) and
+                                   isinstance(child.body[0], ast.Pass)
+                                   for child in node.body):
+                                architecture["interfaces"].append({
+                                    "name": node.name,
+                                    "file": str(py_file.relative_to(path)),
+                                    "methods": [m.name for m in node.body
+                                                if isinstance(m, ast.FunctionDef)]
+                                })
 
-                    except Exception as e:
-                        logger.error(f"Error analyzing architecture for {py_file}: {e}")
+                            # Detect common patterns
+                            if any(base.id == 'ABC' for base in node.bases
+                                   if isinstance(base, ast.Name)):
+                                architecture["patterns"].append({
+                                    "type": "abstract_class",
+                                    "name": node.name,
+                                    "file": str(py_file.relative_to(path))
+                                })
+
+                except Exception as e:
+                    logger.error(f"Error analyzing architecture for {py_file}: {e}")
 
             # Identify layers based on directory structure
             layers = set()
@@ -341,6 +338,33 @@ class CodeStructureAnalyzer(BaseTool):
 
         return hierarchy
 
+def _extract_imports(file_path: str) -> Optional[Tuple[List[tuple], FrozenSet[str]]]:
+    """Return ``(kind, module, name, alias, level, line)`` import records for a file,
+    with the imported names that look unused.
+
+    Runs in worker processes, so it only returns plain picklable data.
+    """
+    parsed = load_parsed_file(file_path)
+    if not parsed:
+        return None
+
+    content, tree = parsed
+    records = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for name in node.names:
+                records.append(("import", None, name.name, name.asname, 0, node.lineno))
+        elif isinstance(node, ast.ImportFrom):
+            for name in node.names:
+                records.append(("from", node.module, name.name, name.asname, node.level, node.lineno))
+
+    # Basic check: the name never appears on its own after an import of it
+    unused = frozenset(
+        name for name in {record[2] for record in records}
+        if name and name not in content.split(f"import {name}")[1:]
+    )
+    return records, unused
+
 class ImportAnalyzer(BaseTool):
     """Analyze import statements and dependencies"""
 
@@ -358,11 +382,14 @@ class ImportAnalyzer(BaseTool):
             return cached
 
         try:
+            imports, unused = await self._analyze_imports(path)
+            statistics = await self._generate_statistics(imports)
+            issues = await self._find_issues(imports, unused)
             result = {
-                "imports": await self._analyze_imports(path),
-                "statistics": await self._generate_statistics(path),
-                "issues": await self._find_issues(path),
-                "suggestions": await self._generate_suggestions(path)
+                "imports": imports,
+                "statistics": statistics,
+                "issues": issues,
+                "suggestions": await self._generate_suggestions(statistics, issues)
             }
 
             self._cache_result(cache_key, result)
@@ -372,79 +399,69 @@ class ImportAnalyzer(BaseTool):
             logger.error(f"Error analyzing imports: {e}")
             return {"error": str(e)}
 
-    def _should_skip(self, path: Path) -> bool:
-        """Check if path should be skipped"""
-        try:
-            if any(excluded in path.parts for excluded in self.analysis_config.excluded_dirs):
-                return True
-            if path.is_file() and any(path.name.endswith(ext) for ext in self.analysis_config.excluded_files):
-                return True
-            return False
-        except:
-            return True
-
-    async def _analyze_imports(self, path: Path) -> Dict[str, Any]:
-        """Analyze all imports in the project"""
+    async def _analyze_imports(self, path: Path) -> Tuple[Dict[str, Any], Dict[str, FrozenSet[str]]]:
+        """Analyze all imports in the project.
+
+        Also returns, per file, the imported names that look unused.
+        """
         imports = {
             "standard_lib": set(),
             "third_party": set(),
             "local": set(),
             "by_file": {}
         }
+        unused_by_file = {}
 
         try:
-            for py_file in path.rglob('*.py'):
-                if not self._should_skip(py_file):
-                    content = safe_read_file(str(py_file))
-                    if not content:
-                        continue
-
-                    file_imports = {
-                        "standard_lib": [],
-                        "third_party": [],
-                        "local": []
-                    }
+            local_modules = self._find_local_modules(path)
+            py_files = list(self._python_paths(path))
+            extracted = await map_in_process_pool(_extract_imports, [str(py_file) for py_file in py_files])
 
-                    try:
-                        tree = ast.parse(content)
-                        for node in ast.walk(tree):
-                            if isinstance(node, ast.Import):
-                                for name in node.names:
-                                    import_info = {
-                                        "name": name.name,
-                                        "alias": name.asname,
-                                        "line": node.lineno
-                                    }
-                                    if self._is_stdlib_import(name.name):
-                                        imports["standard_lib"].add(name.name)
-                                        file_imports["standard_lib"].append(import_info)
-                                    else:
-                                        imports["third_party"].add(name.name)
-                                        file_imports["third_party"].append(import_info)
-
-                            elif isinstance(node, ast.ImportFrom):
-                                for name in node.names:
-                                    import_info = {
-                                        "module": node.module,
-                                        "name": name.name,
-                                        "alias": name.asname,
-                                        "line": node.lineno
-                                    }
-                                    # Assume local import if relative or matches project structure
-                                    if node.level > 0 or str(path) in str(py_file):
-                                        imports["local"].add(f"{node.module}.{name.name}")
-                                        file_imports["local"].append(import_info)
-                                    elif self._is_stdlib_import(node.module):
-                                        imports["standard_lib"].add(f"{node.module}.{name.name}")
-                                        file_imports["standard_lib"].append(import_info)
-                                    else:
-                                        imports["third_party"].add(f"{node.module}.{name.name}")
-                                        file_imports["third_party"].append(import_info)
-
-                    except Exception as e:
-                        logger.error(f"Error analyzing imports for {py_file}: {e}")
-
-                    imports["by_file"][str(py_file.relative_to(path))] = file_imports
+            for py_file, file_result in zip(py_files, extracted):
+                if file_result is None:
+                    continue
+                records, unused = file_result
+
+                file_imports = {
+                    "standard_lib": [],
+                    "third_party": [],
+                    "local": []
+                }
+
+                for kind, module, name, alias, level, line in records:
+                    if kind == "import":
+                        import_info = {
+                            "name": name,
+                            "alias": alias,
+                            "line": line
+                        }
+                        if self._is_stdlib_import(name):
+                            imports["standard_lib"].add(name)
+                            file_imports["standard_lib"].append(import_info)
+                        else:
+                            imports["third_party"].add(name)
+                            file_imports["third_party"].append(import_info)
+                    else:
+                        import_info = {
+                            "module": module,
+                            "name": name,
+                            "alias": alias,
+                            "line": line
+                        }
+                        # Local if relative or rooted at a project module
+                        if level > 0 or module.partition('.')[0] in local_modules:
+                            imports["local"].add(f"{module}.{name}")
+                            file_imports["local"].append(import_info)
+                        elif self._is_stdlib_import(module):
+                            imports["standard_lib"].add(f"{module}.{name}")
+                            file_imports["standard_lib"].append(import_info)
+                        else:
+                            imports["third_party"].add(f"{module}.{name}")
+                            file_imports["third_party"].append(import_info)
+
+                file_key = str(py_file.relative_to(path))
+                imports["by_file"][file_key] = file_imports
+                unused_by_file[file_key] = unused
 
         except Exception as e:
             logger.error(f"Error analyzing imports: {e}")
@@ -454,9 +471,9 @@ class ImportAnalyzer(BaseTool):
         imports["third_party"] = sorted(imports["third_party"])
         imports["local"] = sorted(imports["local"])
 
-        return imports
+        return imports, unused_by_file
 
-    async def _generate_statistics(self, path: Path) -> Dict[str, Any]:
+    async def _generate_statistics(self, imports: Dict[str, Any]) -> Dict[str, Any]:
         """Generate import statistics"""
         stats = {
             "total_imports": 0,
@@ -470,7 +487,6 @@ class ImportAnalyzer(BaseTool):
         }
 
         try:
-            imports = await self._analyze_imports(path)
             import_counts = {}
             file_import_counts = {}
 
@@ -511,13 +527,12 @@ class ImportAnalyzer(BaseTool):
 
         return stats
 
-    async def _find_issues(self, path: Path) -> List[Dict[str, Any]]:
+    async def _find_issues(self, imports: Dict[str, Any],
+                           unused_by_file: Dict[str, FrozenSet[str]]) -> List[Dict[str, Any]]:
         """Find potential import issues"""
         issues = []
 
         try:
-            imports = await self._analyze_imports(path)
-
             for file, file_imports in imports["by_file"].items():
                 # Check for duplicate imports
                 all_imports = []
@@ -534,13 +549,13 @@ class ImportAnalyzer(BaseTool):
                             })
                         all_imports.append(name)
 
-                # Check for unused imports (basic check)
-                content = safe_read_file(str(Path(path) / file))
-                if content:
+                # Check for unused imports (computed with the import records)
+                unused = unused_by_file.get(file)
+                if unused:
                     for imp_type in file_imports.values():
                         for imp in imp_type:
                             name = imp.get("name")
-                            if name and name not in content.split(f"import {name}")[1:]:
+                            if name in unused:
                                 issues.append({
                                     "type": "potentially_unused",
                                     "file": file,
@@ -554,14 +569,12 @@ class ImportAnalyzer(BaseTool):
 
         return issues
 
-    async def _generate_suggestions(self, path: Path) -> List[Dict[str, Any]]:
+    async def _generate_suggestions(self, stats: Dict[str, Any],
+                                    issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Generate import-related suggestions"""
         suggestions = []
 
         try:
-            stats = await self._generate_statistics(path)
-            issues = await self._find_issues(path)
-
             # Suggest organizing imports if there are many
             if stats["total_imports"] > 50:
                 suggestions.append({
@@ -593,15 +606,22 @@ class ImportAnalyzer(BaseTool):
 
         return suggestions
 
+    def _find_local_modules(self, path: Path) -> Set[str]:
+        """Top-level module and package names importable from the project root"""
+        local_modules = {path.name}
+        try:
+            for item in path.iterdir():
+                if item.suffix == '.py':
+                    local_modules.add(item.stem)
+                elif (item / '__init__.py').is_file() and not self._should_skip(item):
+                    local_modules.add(item.name)
+        except OSError as e:
+            logger.warning(f"Error listing {path}: {e}")
+        return local_modules
+
     def _is_stdlib_import(self, module_name: str) -> bool:
         """Check if import is from Python standard library"""
-        stdlib_modules = {
-            'abc', 'argparse', 'ast', 'asyncio', 'collections', 'concurrent',
-            'contextlib', 'datetime', 'functools', 'importlib', 'inspect', 'io',
-            'json', 'logging', 'math', 'os', 'pathlib', 'pickle', 're', 'sys',
-            'threading', 'time', 'typing', 'uuid', 'warnings'
-        }
-        return module_name.split('.')[0] in stdlib_modules
+        return module_name.partition('.')[0] in _STDLIB_MODULES
 
 @dataclass
 class AnalysisResult:
@@ -617,19 +637,22 @@ class ProjectAnalyzer(BaseTool):
         operation = arguments.get('operation', 'analyze')
         target_path = arguments.get('path', '.')
 
-        operations = {
-            'analyze': self._analyze_project,
-            'structure': self._analyze_structure,
-            'dependencies': self._analyze_dependencies,
-            'complexity': self._analyze_complexity,
-            'patterns': self._analyze_patterns
-        }
-
-        if operation not in operations:
-            return {"error": f"Unknown operation: {operation}"}
+        match operation:
+            case 'analyze':
+                handler = self._analyze_project
+            case 'structure':
+                handler = self._analyze_structure
+            case 'dependencies':
+                handler = self._analyze_dependencies
+            case 'complexity':
+                handler = self._analyze_complexity
+            case 'patterns':
+                handler = self._analyze_patterns
+            case _:
+                return {"error": f"Unknown operation: {operation}"}
 
         try:
-            result = await operations[operation](Path(target_path), arguments)
+            result = await handler(Path(target_path), arguments)
             return {"success": True, "data": result}
         except Exception as e:
             logger.error(f"ProjectAnalyzer operation failed: {e}")
@@ -647,7 +670,7 @@ class ProjectAnalyzer(BaseTool):
                 "overview": {
                     "path": str(path),
                     "timestamp": datetime.now().isoformat(),
-                    "total_files": len(structure.get("files", [])),
+                    "total_files": structure.get("statistics", {}).get("total_files", 0),
                     "total_lines": complexity.get("total_lines", 0)
                 },
                 "structure": structure,
@@ -660,23 +683,23 @@ class ProjectAnalyzer(BaseTool):
 
     async def _analyze_structure(self, path: Path, args: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze project structure"""
-        files = []
+        # Per-file data is kept as parallel arrays and only expanded on return
+        file_paths: List[str] = []
+        file_sizes = array('q')
+        file_mtimes = array('d')
         modules = []
 
         try:
-            for file_path in path.rglob("*.py"):
-                if self._should_skip(file_path):
+            for file_path, relative_path in self._iter_python_files(path):
+                parsed = self._get_parsed(file_path)
+                if not parsed:
                     continue
-
-                with tokenize.open(file_path) as f:
-                    content = f.read()
+                _, tree = parsed
 
                 try:
-                    tree = ast.parse(content)
-
                     module_info = {
-                        "name": file_path.stem,
-                        "path": str(file_path.relative_to(path)),
+                        "name": os.path.splitext(os.path.basename(file_path))[0],
+                        "path": relative_path,
                         "classes": [],
                         "functions": [],
                         "imports": []
@@ -716,20 +739,26 @@ class ProjectAnalyzer(BaseTool):
                                     })
 
                     modules.append(module_info)
-                    files.append({
-                        "path": str(file_path.relative_to(path)),
-                        "size": file_path.stat().st_size,
-                        "last_modified": datetime.fromtimestamp(file_path.stat().st_mtime).isoformat()
-                    })
+                    stat = os.stat(file_path)
+                    file_paths.append(relative_path)
+                    file_sizes.append(stat.st_size)
+                    file_mtimes.append(stat.st_mtime)
 
                 except Exception as e:
                     logger.error(f"Failed to analyze {file_path}: {e}")
 
             return {
-                "files": files,
+                "files": [
+                    {
+                        "path": file_path,
+                        "size": size,
+                        "last_modified": datetime.fromtimestamp(mtime).isoformat()
+                    }
+                    for file_path, size, mtime in zip(file_paths, file_sizes, file_mtimes)
+                ],
                 "modules": modules,
                 "statistics": {
-                    "total_files": len(files),
+                    "total_files": len(file_paths),
                     "total_modules": len(modules),
                     "total_classes": sum(len(m["classes"]) for m in modules),
                     "total_functions": sum(len(m["functions"]) for m in modules)
@@ -746,19 +775,16 @@ class ProjectAnalyzer(BaseTool):
             external_deps = set()
             stdlib_deps = set()
 
-            for file_path in path.rglob("*.py"):
-                if self._should_skip(file_path):
+            for file_path, relative_path in self._iter_python_files(path):
+                parsed = self._get_parsed(file_path)
+                if not parsed:
                     continue
-
-                with tokenize.open(file_path) as f:
-                    content = f.read()
+                _, tree = parsed
 
                 try:
-                    tree = ast.parse(content)
-                    relative_path = str(file_path.relative_to(path))
                     import_graph[relative_path] = {"imports": [], "imported_by": []}
 
-                    for node in ast.walk(tree):
+                    for node in iter_module_imports(tree):
                         if isinstance(node, ast.Import):
                             for alias in node.names:
                                 import_graph[relative_path]["imports"].append(alias.name)
@@ -811,56 +837,22 @@ class ProjectAnalyzer(BaseTool):
 
             file_count = 0
 
-            for file_path in path.rglob("*.py"):
-                if self._should_skip(file_path):
-                    continue
-
-                with tokenize.open(file_path) as f:
-                    content = f.read()
+            # Per-file results persist across sessions until the file changes
+            fresh_results = []
 
+            for file_path, relative_path in self._iter_python_files(path):
                 try:
-                    tree = ast.parse(content)
-                    lines = content.splitlines()
+                    file_complexity = metrics_cache.get(file_path, "complexity")
+                    if file_complexity is None:
+                        # Signed before reading, so an edit during the scan invalidates the row
+                        signature = file_signature(file_path)
+                        parsed = self._get_parsed(file_path)
+                        if not parsed:
+                            continue
+                        content, tree = parsed
+                        file_complexity = self._file_complexity(content, tree)
+                        fresh_results.append((file_path, signature, file_complexity))
 
-                    file_complexity = {
-                        "lines": len(lines),
-                        "code_lines": len([l for l in lines if l.strip() and not l.strip().startswith("#")]),
-                        "classes": [],
-                        "functions": [],
-                        "complexity_score": 0
-                    }
-
-                    # Analyze classes and methods
-                    for node in ast.walk(tree):
-                        if isinstance(node, ast.ClassDef):
-                            class_info = {
-                                "name": node.name,
-                                "methods": [],
-                                "complexity": self._calculate_node_complexity(node)
-                            }
-
-                            for method in node.body:
-                                if isinstance(method, ast.FunctionDef):
-                                    method_complexity = self._calculate_node_complexity(method)
-                                    class_info["methods"].append({
-                                        "name": method.name,
-                                        "complexity": method_complexity
-                                    })
-                                    class_info["complexity"] += method_complexity
-
-                            file_complexity["classes"].append(class_info)
-                            file_complexity["complexity_score"] += class_info["complexity"]
-
-                        elif isinstance(node, ast.FunctionDef):
-                            if not any(isinstance(parent, ast.ClassDef) for parent in ast.walk(tree)):
-                                func_complexity = self._calculate_node_complexity(node)
-                                file_complexity["functions"].append({
-                                    "name": node.name,
-                                    "complexity": func_complexity
-                                })
-                                file_complexity["complexity_score"] += func_complexity
-
-                    relative_path = str(file_path.relative_to(path))
                     complexity_data["files"][relative_path] = file_complexity
                     complexity_data["total_lines"] += file_complexity["lines"]
                     complexity_data["total_complexity"] += file_complexity["complexity_score"]
@@ -878,6 +870,8 @@ class ProjectAnalyzer(BaseTool):
                 except Exception as e:
                     logger.error(f"Failed to analyze complexity in {file_path}: {e}")
 
+            metrics_cache.put_many("complexity", fresh_results)
+
             if file_count > 0:
                 complexity_data["average_complexity"] = complexity_data["total_complexity"] / file_count
 
@@ -889,6 +883,50 @@ class ProjectAnalyzer(BaseTool):
         except Exception as e:
             raise RuntimeError(f"Complexity analysis failed: {e}")
 
+    def _file_complexity(self, content: str, tree: ast.AST) -> Dict[str, Any]:
+        """Complexity metrics for a single parsed file"""
+        lines = content.splitlines()
+
+        file_complexity = {
+            "lines": len(lines),
+            "code_lines": len([l for l in lines if l.strip() and not l.strip().startswith("#")]),
+            "classes": [],
+            "functions": [],
+            "complexity_score": 0
+        }
+
+        # Analyze classes and methods
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ClassDef):
+                class_info = {
+                    "name": node.name,
+                    "methods": [],
+                    "complexity": self._calculate_node_complexity(node)
+                }
+
+                for method in node.body:
+                    if isinstance(method, ast.FunctionDef):
+                        method_complexity = self._calculate_node_complexity(method)
+                        class_info["methods"].append({
+                            "name": method.name,
+                            "complexity": method_complexity
+                        })
+                        class_info["complexity"] += method_complexity
+
+                file_complexity["classes"].append(class_info)
+                file_complexity["complexity_score"] += class_info["complexity"]
+
+            elif isinstance(node, ast.FunctionDef):
+                if not any(isinstance(parent, ast.ClassDef) for parent in ast.walk(tree)):
+                    func_complexity = self._calculate_node_complexity(node)
+                    file_complexity["functions"].append({
+                        "name": node.name,
+                        "complexity": func_complexity
+                    })
+                    file_complexity["complexity_score"] += func_complexity
+
+        return file_complexity
+
     async def _analyze_patterns(self, path: Path, args: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze code patterns and anti-patterns"""
         try:
@@ -902,17 +940,13 @@ class ProjectAnalyzer(BaseTool):
                 }
             }
 
-            for file_path in path.rglob("*.py"):
-                if self._should_skip(file_path):
+            for file_path, relative_path in self._iter_python_files(path):
+                parsed = self._get_parsed(file_path)
+                if not parsed:
                     continue
-
-                with tokenize.open(file_path) as f:
-                    content = f.read()
+                _, tree = parsed
 
                 try:
-                    tree = ast.parse(content)
-                    relative_path = str(file_path.relative_to(path))
-
                     # Analyze design patterns
                     self._find_design_patterns(tree, relative_path, patterns_data)
 
@@ -944,13 +978,7 @@ class ProjectAnalyzer(BaseTool):
 
     def _is_stdlib_module(self, module_name: str) -> bool:
         """Check if a module is from Python standard library"""
-        stdlib_modules = {
-            'abc', 'argparse', 'ast', 'asyncio', 'collections', 'concurrent',
-            'contextlib', 'datetime', 'functools', 'importlib', 'inspect', 'io',
-            'json', 'logging', 'math', 'os', 'pathlib', 'pickle', 're', 'sys',
-            'threading', 'time', 'typing', 'uuid', 'warnings'
-        }
-        return module_name.split('.')[0] in stdlib_modules
+        return module_name.partition('.')[0] in _STDLIB_MODULES
 
     def _find_design_patterns(self, tree: ast.AST, file_path: str,
                               patterns_data: Dict[str, Any]) -> None:
@@ -993,7 +1021,7 @@ class ProjectAnalyzer(BaseTool):
         for node in ast.walk(tree):
             # God Class (too many methods)
             if isinstance(node, ast.ClassDef):
-                methods = len([n for n in node.body if isinstance(n, ast.FunctionDef)])
+                methods = sum(1 for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)))
                 if methods > 20:
                     patterns_data["anti_patterns"].append({
                         "type": "god_class",
@@ -1004,13 +1032,14 @@ class ProjectAnalyzer(BaseTool):
                     })
 
             # Long Method
-            if isinstance(node, ast.FunctionDef):
-                if len(node.body) > 50:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                length = node.end_lineno - node.lineno + 1
+                if length > 50:
                     patterns_data["code_smells"].append({
                         "type": "long_method",
                         "file": file_path,
                         "function": node.name,
-                        "length": len(node.body),
+                        "length": length,
                         "line": node.lineno
                     })
 
@@ -1078,12 +1107,11 @@ class CodeValidator(BaseTool):
 
         try:
             # Read file content
-            with tokenize.open(path) as f:
-                content = f.read()
+            content = await self._run_blocking(_read_python_source, path)
 
             # Basic syntax check
             try:
-                ast.parse(content)
+                parse_source(content)
                 validation_results["validations"].append({
                     "type": "syntax",
                     "status": "passed",
@@ -1199,7 +1227,7 @@ class CodeValidator(BaseTool):
         """Check code complexity issues"""
         issues = []
         try:
-            tree = ast.parse(content)
+            tree = parse_source(content)
             for node in ast.walk(tree):
                 if isinstance(node, ast.FunctionDef):
                     complexity = self._calculate_complexity(node)
@@ -1261,8 +1289,7 @@ class SyntaxChecker(BaseTool):
             raise ValueError("Only Python language is supported")
 
         try:
-            with tokenize.open(path) as f:
-                content = f.read()
+            content = await self._run_blocking(_read_python_source, path)
 
             analysis_result = {
                 "file": str(path),
@@ -1274,7 +1301,7 @@ class SyntaxChecker(BaseTool):
 
             # Basic syntax check
             try:
-                tree = ast.parse(content)
+                tree = parse_source(content)
                 analysis_result["syntax_valid"] = True
             except SyntaxError as e:
                 analysis_result["details"].append({
@@ -1393,7 +1420,7 @@ class SyntaxChecker(BaseTool):
                     "name": node.name,
                     "line": node.lineno,
                     "bases": len(node.bases),
-                    "methods": len([n for n in node.body if isinstance(n, ast.FunctionDef)]),
+                    "methods": sum(1 for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))),
                     "complexity": self._calculate_node_complexity(node)
                 }
                 ast_analysis["complexity"]["classes"].append(class_info)
@@ -1434,7 +1461,7 @@ class SyntaxChecker(BaseTool):
                         "line": node.lineno
                     }
                     import_analysis["imports"].append(import_info)
-                    import_analysis["stats"]["unique_modules"].add(name.name.split('.')[0])
+                    import_analysis["stats"]["unique_modules"].add(name.name.partition('.')[0])
                     import_analysis["stats"]["total_imports"] += 1
 
             elif isinstance(node, ast.ImportFrom):
@@ -1448,12 +1475,12 @@ class SyntaxChecker(BaseTool):
                             "line": node.lineno
                         }
                         import_analysis["from_imports"].append(import_info)
-                        import_analysis["stats"]["unique_modules"].add(node.module.split('.')[0])
+                        import_analysis["stats"]["unique_modules"].add(node.module.partition('.')[0])
                         import_analysis["stats"]["total_imports"] += 1
                         if node.level > 0:
                             import_analysis["stats"]["relative_imports"] += 1
 
-        import_analysis["stats"]["unique_modules"] = list(import_analysis["stats"]["unique_modules"])
+        import_analysis["stats"]["unique_modules"] = sorted(import_analysis["stats"]["unique_modules"])
         return import_analysis
 
     async def _analyze_naming(self, tree: ast.AST) -> Dict[str, Any]:
@@ -1,12 +1,41 @@
 from abc import ABC, abstractmethod
 from ..config import analysis_config, system_config
+import ast
+import asyncio
+import json
 import os
 import logging
+import mmap
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Dict, Any, Union, Optional
+from typing import List, Dict, Any, Union, Optional, Iterable, Iterator, Tuple, Callable
 import chardet
+from difflib import SequenceMatcher
 from functools import lru_cache
 
+try:
+    from rapidfuzz.fuzz import ratio as _fuzz_ratio
+except ImportError:
+    _fuzz_ratio = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
 @lru_cache(maxsize=1000)
@@ -35,6 +64,60 @@ def calculate_directory_size(path: Union[str, Path]) -> int:
         logger.error(f"Error calculating directory size for {path}: {e}")
     return total_size
 
+def iter_directory(path: Union[str, Path],
+                   excluded_dirs: Iterable[str] = (),
+                   excluded_files: Iterable[str] = (),
+                   excluded_paths: Iterable[Union[str, Path]] = ()) -> Iterator[Tuple[os.DirEntry, int, str]]:
+    """Walk a directory tree top-down with an explicit os.scandir stack.
+
+    Excluded directories are pruned before they are descended into and only
+    one directory handle is open at a time. ``excluded_dirs`` matches
+    directory names at any depth, ``excluded_paths`` specific directories. Yields ``(entry, depth, relative)``
+    where direct children of ``path`` have depth 1 and ``relative`` is the
+    entry's path below ``path``, built up as a string rather than via
+    Path.relative_to.
+    """
+    excluded_dirs = set(excluded_dirs)
+    excluded_suffixes = tuple(excluded_files)
+    excluded_paths = {os.path.abspath(excluded) for excluded in excluded_paths}
+    stack = [(os.fspath(path), 1, '')]
+
+    while stack:
+        current, depth, prefix = stack.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError as e:
+            logger.warning(f"Cannot scan directory {current}: {e}")
+            continue
+
+        with entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+
+                relative = prefix + entry.name
+                if is_dir:
+                    if entry.name in excluded_dirs:
+                        continue
+                    if excluded_paths and os.path.abspath(entry.path) in excluded_paths:
+                        continue
+                    stack.append((entry.path, depth + 1, relative + os.sep))
+                elif excluded_suffixes and entry.name.endswith(excluded_suffixes):
+                    continue
+
+                yield entry, depth, relative
+
+def iter_python_files(path: Union[str, Path],
+                      excluded_dirs: Iterable[str] = (),
+                      excluded_files: Iterable[str] = (),
+                      excluded_paths: Iterable[Union[str, Path]] = ()) -> Iterator[Tuple[str, str]]:
+    """Yield ``(file_path, relative_path)`` for every Python file under path"""
+    for entry, _, relative in iter_directory(path, excluded_dirs, excluded_files, excluded_paths):
+        if entry.name.endswith('.py') and entry.is_file():
+            yield entry.path, relative
+
 def safe_read_file(file_path: Union[str, Path], base_path: Optional[Union[str, Path]] = None) -> Optional[str]:
     """Safely read a file with proper encoding detection and error handling"""
     try:
@@ -98,6 +181,308 @@ def safe_read_file(file_path: Union[str, Path], base_path: Optional[Union[str, P
         logger.error(f"Error processing file path {file_path}: {e}")
         return None
 
+# Parsed Python files shared by all tools, keyed by absolute path
+AST_CACHE_SIZE = 512
+_ast_cache: "OrderedDict[str, Tuple[int, Optional[str], Optional[ast.Module]]]" = OrderedDict()
+_ast_cache_lock = threading.Lock()
+
+# Upper bound on files read concurrently by gather_parsed_files
+IO_CONCURRENCY = 64
+
+def get_parsed_file(file_path: Union[str, Path],
+                    prefilter: Optional[Callable[[str], bool]] = None) -> Optional[Tuple[str, ast.Module]]:
+    """Return ``(content, tree)`` for a Python file, re-parsing only when its mtime changes.
+
+    Trees are shared between tools and must be treated as read-only. Returns
+    None if the file is empty, skipped by read_source_file or has a syntax error.
+    If ``prefilter`` is given and rejects the source text, None is returned
+    without parsing the file.
+    """
+    key = os.path.abspath(file_path)
+    try:
+        mtime = os.stat(key).st_mtime_ns
+    except OSError as e:
+        logger.error(f"Error reading file {key}: {e}")
+        return None
+
+    with _ast_cache_lock:
+        cached = _ast_cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            _ast_cache.move_to_end(key)
+
+    if cached is not None and cached[0] == mtime:
+        content, tree = cached[1], cached[2]
+        if content and prefilter is not None and not prefilter(content):
+            return None
+    else:
+        content = read_source_file(key)
+        if content and prefilter is not None and not prefilter(content):
+            return None
+
+        tree = None
+        if content:
+            try:
+                tree = ast.parse(content, filename=key)
+            except (SyntaxError, ValueError) as e:
+                logger.error(f"Error parsing {key}: {e}")
+
+        with _ast_cache_lock:
+            _ast_cache[key] = (mtime, content, tree)
+            _ast_cache.move_to_end(key)
+            if len(_ast_cache) > AST_CACHE_SIZE:
+                _ast_cache.popitem(last=False)
+
+    if tree is None:
+        return None
+    return content, tree
+
+def load_parsed_file(file_path: Union[str, Path]) -> Optional[Tuple[str, ast.Module]]:
+    """``(content, tree)`` for a file, for functions run by map_in_process_pool.
+
+    In the server process this is get_parsed_file. Pool workers read and
+    parse directly instead: the caches belong to the server process, and
+    trees built in a worker never reach it.
+    """
+    if not _in_worker_process:
+        return get_parsed_file(file_path)
+
+    content = read_source_file(file_path)
+    if not content:
+        return None
+    try:
+        return content, ast.parse(content, filename=os.fspath(file_path))
+    except (SyntaxError, ValueError) as e:
+        logger.error(f"Error parsing {file_path}: {e}")
+        return None
+
+# Trees parsed from in-memory text (edit sections, file contents) kept by parse_source
+SOURCE_TREE_CACHE_SIZE = 16
+
+@lru_cache(maxsize=SOURCE_TREE_CACHE_SIZE)
+def parse_source(content: str) -> ast.Module:
+    """Parse source text once for every analysis of the same text.
+
+    Several tools run a handful of independent checks over one string; they
+    share the tree and must treat it as read-only. Syntax errors propagate
+    and are not cached.
+    """
+    return ast.parse(content)
+
+# Line breaks as the tokenizer counts them; str.splitlines also splits on \f and friends
+_SOURCE_LINE = re.compile(r'.*?(?:\r\n|\r|\n)|.+', re.DOTALL)
+
+def source_lines(content: str) -> List[str]:
+    """Split source into lines (with endings) numbered like AST line numbers"""
+    return _SOURCE_LINE.findall(content)
+
+def source_segment(lines: List[str], node: ast.AST) -> Optional[str]:
+    """Source text of node sliced from pre-split lines.
+
+    Same result as ast.get_source_segment, which re-splits the whole source
+    on every call; column offsets are UTF-8 byte offsets.
+    """
+    try:
+        if node.end_lineno is None or node.end_col_offset is None:
+            return None
+        lineno = node.lineno - 1
+        end_lineno = node.end_lineno - 1
+        col_offset = node.col_offset
+        end_col_offset = node.end_col_offset
+    except AttributeError:
+        return None
+
+    if lineno == end_lineno:
+        return lines[lineno].encode()[col_offset:end_col_offset].decode()
+
+    first = lines[lineno].encode()[col_offset:].decode()
+    last = lines[end_lineno].encode()[:end_col_offset].decode()
+    return first + ''.join(lines[lineno + 1:end_lineno]) + last
+
+async def gather_parsed_files(paths: Iterable[Path],
+                              prefilter: Optional[Callable[[str], bool]] = None,
+                              limit: int = IO_CONCURRENCY) -> List[Tuple[Path, Tuple[str, ast.Module]]]:
+    """Read and parse files in the shared I/O pool without blocking the event loop.
+
+    At most ``limit`` files are in flight at once. Results keep the input
+    order; files that get_parsed_file rejects are left out.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def load(path: Path) -> Optional[Tuple[str, ast.Module]]:
+        async with semaphore:
+            return await run_in_io_pool(get_parsed_file, path, prefilter)
+
+    paths = list(paths)
+    results = await asyncio.gather(*(load(path) for path in paths))
+    return [(path, parsed) for path, parsed in zip(paths, results) if parsed]
+
+async def gather_source_files(paths: Iterable[Path],
+                              limit: int = IO_CONCURRENCY) -> List[Tuple[Path, str]]:
+    """Read source files in the shared I/O pool, at most ``limit`` at a time.
+
+    Results keep the input order; files read_source_file skips or finds
+    empty are left out.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def load(path: Path) -> Optional[str]:
+        async with semaphore:
+            return await run_in_io_pool(read_source_file, path)
+
+    paths = list(paths)
+    results = await asyncio.gather(*(load(path) for path in paths))
+    return [(path, content) for path, content in zip(paths, results) if content]
+
+def files_signature(paths: Iterable[Union[str, Path]]) -> int:
+    """Hash of paths with their mtimes and sizes, for invalidating project-wide results"""
+    stats = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        stats.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return hash(tuple(stats))
+
+# Statements whose bodies still run at import time
+_IMPORT_TIME_BLOCKS = (ast.If, ast.Try) + ((ast.TryStar,) if hasattr(ast, 'TryStar') else ())
+
+def iter_module_imports(tree: ast.Module) -> Iterator[Union[ast.Import, ast.ImportFrom]]:
+    """Yield module-level imports, including those under if/try blocks.
+
+    Function and class bodies are not visited, so lazy imports are not
+    reported; this keeps dependency scans proportional to top-level statements.
+    """
+    stack = list(reversed(tree.body))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            yield node
+        elif isinstance(node, _IMPORT_TIME_BLOCKS):
+            blocks = [node.body, node.orelse]
+            if not isinstance(node, ast.If):
+                blocks.extend(handler.body for handler in node.handlers)
+                blocks.append(node.finalbody)
+            for block in reversed(blocks):
+                stack.extend(reversed(block))
+
+# Threads shared by blocking file reads, created on first use
+_io_pool: Optional[ThreadPoolExecutor] = None
+
+def get_io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    if _io_pool is None:
+        _io_pool = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4),
+                                      thread_name_prefix='mca-io')
+    return _io_pool
+
+async def run_in_io_pool(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking call in the shared I/O thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(get_io_pool(), func, *args)
+
+# Worker processes shared by CPU-bound project scans, created on first use
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+# True inside pool workers, which parse files without the shared caches
+_in_worker_process = False
+
+def _init_worker_process() -> None:
+    global _in_worker_process
+    _in_worker_process = True
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    global _process_pool
+    if _process_pool is None:
+        try:
+            # Forked workers inherit the caches' locks and sqlite handle;
+            # the initializer marks them so they never touch either
+            _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                                initializer=_init_worker_process)
+        except (OSError, NotImplementedError) as e:
+            logger.warning(f"Process pool unavailable, scanning in-process: {e}")
+    return _process_pool
+
+def _apply_to_batch(func: Callable[[Any], Any], batch: List[Any]) -> List[Any]:
+    return [func(item) for item in batch]
+
+async def map_in_process_pool(func: Callable[[Any], Any], items: List[Any], chunk_size: int = 16) -> List[Any]:
+    """Apply a picklable module-level function to items in worker processes, keeping order.
+
+    Small inputs, or a pool that cannot be started, run in-process instead.
+    """
+    global _process_pool
+    pool = get_process_pool() if len(items) > chunk_size else None
+    if pool is None:
+        return _apply_to_batch(func, items)
+
+    loop = asyncio.get_running_loop()
+    batches = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    try:
+        results = await asyncio.gather(
+            *(loop.run_in_executor(pool, _apply_to_batch, func, batch) for batch in batches)
+        )
+    except BrokenProcessPool as e:
+        logger.warning(f"Process pool failed, scanning in-process: {e}")
+        _process_pool = None
+        return _apply_to_batch(func, items)
+
+    return [result for batch in results for result in batch]
+
+def shutdown_pools() -> None:
+    """Stop the shared I/O threads and worker processes"""
+    global _io_pool, _process_pool
+    if _io_pool is not None:
+        _io_pool.shutdown(wait=False, cancel_futures=True)
+        _io_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+# Recently skipped source files as (path, reason), bounded for long-running servers
+skipped_files: "deque[Tuple[str, str]]" = deque(maxlen=1000)
+
+# Below this size reading a file is cheaper than mapping it
+MMAP_MIN_SIZE = 64 * 1024
+
+def _decode_source(path: str, raw) -> Optional[str]:
+    """Decode source bytes (or any buffer such as an mmap); None if binary"""
+    if raw[:2] in (b'\xff\xfe', b'\xfe\xff'):
+        return str(raw, 'utf-16', 'replace')
+    if raw.find(b'\x00', 0, 8192) != -1:
+        skipped_files.append((path, "binary"))
+        return None
+
+    try:
+        return str(raw, 'utf-8-sig')
+    except UnicodeDecodeError:
+        return str(raw, 'utf-8', 'replace')
+
+def read_source_file(file_path: Union[str, Path]) -> Optional[str]:
+    """Read a source file for analysis, skipping oversized and binary files.
+
+    Content is decoded as UTF-8; undecodable bytes are replaced rather than
+    aborting the scan. Large files are decoded from a memory map, so no
+    intermediate bytes copy is made. Returns None for skipped or unreadable
+    files.
+    """
+    path = os.fspath(file_path)
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size > system_config.MAX_FILE_SIZE:
+                skipped_files.append((path, "oversize"))
+                return None
+            if size < MMAP_MIN_SIZE:
+                raw_content = f.read()
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return _decode_source(path, mapped)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading file {path}: {e}")
+        return None
+
+    return _decode_source(path, raw_content)
+
 def get_relative_path(base_path: Union[str, Path], full_path: Union[str, Path]) -> str:
     try:
         base = Path(base_path).resolve()
@@ -110,11 +495,112 @@ def get_relative_path(base_path: Union[str, Path], full_path: Union[str, Path])
         logger.error(f"Error getting relative path: {e}")
         return str(full_path)
 
+def intern_path(path: Union[str, Path]) -> str:
+    """Interned string form of a path, for keys and records repeated across results"""
+    return sys.intern(os.fspath(path))
+
+# Linux ioctl that makes dst share src's data blocks (copy-on-write)
+_FICLONE = 0x40049409
+
+def clone_file(src: Union[str, Path], dst: Union[str, Path], metadata: bool = False) -> None:
+    """Copy src to dst as a reflink where the filesystem supports it.
+
+    On Btrfs, XFS and similar the copy only writes metadata; elsewhere it
+    falls back to shutil.copyfile. With ``metadata`` the permission bits
+    and timestamps are copied as well, like shutil.copy2.
+    """
+    cloned = False
+    if fcntl is not None and sys.platform.startswith('linux'):
+        try:
+            with open(src, 'rb') as source, open(dst, 'wb') as target:
+                fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+            cloned = True
+        except OSError:
+            pass
+
+    if not cloned:
+        shutil.copyfile(src, dst)
+    if metadata:
+        shutil.copystat(src, dst)
+
+def replace_file(path: Union[str, Path], data: bytes) -> None:
+    """Atomically replace an existing file's content with data.
+
+    The bytes go to a temporary file in the same directory, are flushed to
+    disk and renamed over path, so a crash leaves either the old or the new
+    content. The original file's permission bits are kept.
+    """
+    path = os.fspath(path)
+    directory, name = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory or None, prefix=f".{name}.", suffix='.tmp')
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+def dumps_json(obj: Any, indent: bool = False) -> str:
+    """Serialize a tool result to JSON text, with orjson when it is installed.
+
+    Falls back to json.dumps for values orjson rejects (e.g. integers
+    beyond 64 bits), so output never depends on the optional extra.
+    ``indent`` pretty-prints with two spaces.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(obj, option=option).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+
+class BoundedCache:
+    """LRU cache with an entry limit and optional time-to-live"""
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        stored_at, value = item
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any) -> None:
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
 class BaseTool(ABC):
     def __init__(self):
         self.analysis_config = analysis_config
         self.system_config = system_config
-        self._cache = {}
+        self._cache = BoundedCache(system_config.MAX_CACHE_SIZE, ttl=system_config.CACHE_TTL)
 
     @abstractmethod
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -122,15 +608,16 @@ class BaseTool(ABC):
 
     def _cache_result(self, key: str, result: Any):
         if self.system_config.ENABLE_CACHE:
-            if len(self._cache) >= self.system_config.MAX_CACHE_SIZE:
-                self._cache.pop(next(iter(self._cache)))
-            self._cache[key] = result
+            self._cache.set(key, result)
 
     def _get_cached_result(self, key: str) -> Optional[Any]:
         if self.system_config.ENABLE_CACHE:
             return self._cache.get(key)
         return None
 
+    def _get_parsed(self, path: Union[str, Path]) -> Optional[Tuple[str, ast.Module]]:
+        return get_parsed_file(path)
+
     def _get_absolute_path(self, path: Union[str, Path], base_path: Optional[Union[str, Path]] = None) -> Path:
         try:
             path = Path(path)
@@ -182,15 +669,21 @@ class BaseTool(ABC):
             logger.error(f"Error validating path {path}: {e}")
             return False
 
+    async def _run_blocking(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await run_in_io_pool(func, *args)
+
+    def _iter_python_files(self, path: Union[str, Path]) -> Iterator[Tuple[str, str]]:
+        return iter_python_files(path, self.analysis_config.excluded_dirs,
+                                 self.analysis_config.excluded_files)
+
+    def _python_paths(self, path: Union[str, Path]) -> Iterator[Path]:
+        """Python files under path as Path objects, pruning excluded directories"""
+        path = Path(path)
+        for _, relative in self._iter_python_files(path):
+            yield path / relative
+
     def _should_skip_path(self, path: Path) -> bool:
-        try:
-            if any(excluded in path.parts for excluded in self.analysis_config.excluded_dirs):
-                return True
-            if path.is_file() and any(path.name.endswith(ext) for ext in self.analysis_config.excluded_files):
-                return True
-            return False
-        except Exception:
-            return True
+        return self._should_skip(path)
 
     def _is_valid_project_path(self, path: Path) -> bool:
         try:
@@ -223,30 +716,38 @@ class BaseTool(ABC):
 
     @staticmethod
     def find_similar_files(files: List[Dict[str, Any]], threshold: float = 0.8) -> List[Dict[str, Any]]:
-        from difflib import SequenceMatcher
-        similar_groups = []
-        for i, file1 in enumerate(files):
-            similar = []
-            for j, file2 in enumerate(files):
-                if i != j:
-                    similarity = SequenceMatcher(None, file1['name'], file2['name']).ratio()
-                    if similarity >= threshold:
-                        similar.append({
-                            'file': file2['path'],
-                            'similarity': similarity
-                        })
-            if similar:
-                similar_groups.append({
-                    'file': file1['path'],
-                    'similar_to': similar
-                })
-        return similar_groups
+        names = [file_info['name'] for file_info in files]
+        similar = [[] for _ in files]
+        # Without rapidfuzz, pin one side so SequenceMatcher keeps its index of it
+        matcher = SequenceMatcher(None, autojunk=False) if _fuzz_ratio is None else None
+
+        # Similarity is treated as symmetric, so each pair is scored once
+        for i, name1 in enumerate(names):
+            if matcher:
+                matcher.set_seq2(name1)
+            for j in range(i + 1, len(names)):
+                if matcher:
+                    matcher.set_seq1(names[j])
+                    similarity = matcher.ratio()
+                else:
+                    similarity = _fuzz_ratio(name1, names[j], score_cutoff=threshold * 100) / 100.0
+                if similarity >= threshold:
+                    similar[i].append({'file': files[j]['path'], 'similarity': similarity})
+                    similar[j].append({'file': files[i]['path'], 'similarity': similarity})
+
+        return [
+            {'file': file_info['path'], 'similar_to': matches}
+            for file_info, matches in zip(files, similar)
+            if matches
+        ]
 
     def _should_skip(self, path: Path) -> bool:
         try:
-            if any(excluded in path.parts for excluded in self.analysis_config.excluded_dirs):
+            if not self.analysis_config.excluded_dirs.isdisjoint(path.parts):
                 return True
-            if path.is_file() and any(path.name.endswith(ext) for ext in self.analysis_config.excluded_files):
+            # Excluded entries are all suffixes or dotfile names, so one lookup each suffices
+            excluded_files = self.analysis_config.excluded_files
+            if (path.suffix in excluded_files or path.name in excluded_files) and path.is_file():
                 return True
             return False
         except Exception:
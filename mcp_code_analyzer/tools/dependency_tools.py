@@ -1,9 +1,10 @@
 import ast
 import logging
+import os
 from pathlib import Path
-from typing import Dict, Any, List
-import networkx as nx
-from .base import BaseTool ,safe_read_file
+from typing import Dict, Any, List, Optional, Set, Tuple
+from .base import BaseTool, files_signature, gather_parsed_files, iter_module_imports
+from .graph import DependencyGraph
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +13,9 @@ class FileDependencyAnalyzer(BaseTool):
 
     def __init__(self):
         super().__init__()
-        self.dependency_graph = nx.DiGraph()
+        self.dependency_graph = DependencyGraph()
+        # Import graph between project files, rebuilt when any Python file changes
+        self._file_graph: Optional[Tuple[int, DependencyGraph]] = None
 
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         file_path = arguments.get('file_path')
@@ -52,11 +55,11 @@ class FileDependencyAnalyzer(BaseTool):
         }
 
         try:
-            content = safe_read_file(str(path))
-            if content:
-                tree = ast.parse(content)
+            parsed = self._get_parsed(path)
+            if parsed:
+                _, tree = parsed
 
-                for node in ast.walk(tree):
+                for node in iter_module_imports(tree):
                     if isinstance(node, ast.Import):
                         for name in node.names:
                             deps["imports"].append({
@@ -89,7 +92,7 @@ class FileDependencyAnalyzer(BaseTool):
 
         try:
             # Get all paths except input path's successors
-            all_paths = list(nx.dfs_edges(self.dependency_graph, str(path)))
+            all_paths = self.dependency_graph.dfs_edges(str(path))
             direct_deps = set(self.dependency_graph.successors(str(path)))
 
             for source, target in all_paths:
@@ -105,48 +108,37 @@ class FileDependencyAnalyzer(BaseTool):
 
         return indirect_deps
 
-    def _should_skip(self, path: Path) -> bool:
-        """Check if path should be skipped"""
-        try:
-            if any(excluded in path.parts for excluded in self.analysis_config.excluded_dirs):
-                return True
-            if path.is_file() and any(path.name.endswith(ext) for ext in self.analysis_config.excluded_files):
-                return True
-            return False
-        except:
-            return True
-
     async def _find_dependents(self, path: Path) -> List[Dict[str, Any]]:
         """Find files that depend on this file"""
         dependents = []
 
         try:
-            for py_file in Path('.').rglob('*.py'):
-                if py_file != path and not self._should_skip(py_file):
-                    content = safe_read_file(str(py_file))
-                    if not content:
-                        continue
-
-                    tree = ast.parse(content)
-                    found = False
-
-                    for node in ast.walk(tree):
-                        if isinstance(node, (ast.Import, ast.ImportFrom)):
-                            module_name = path.stem
-                            if (isinstance(node, ast.Import) and
-                                    any(name.name == module_name for name in node.names)):
-                                found = True
-                                break
-                            elif (isinstance(node, ast.ImportFrom) and
-                                  node.module and module_name in node.module):
-                                found = True
-                                break
-
-                    if found:
-                        dependents.append({
-                            "file": str(py_file),
-                            "type": "direct" if self.dependency_graph.has_edge(str(py_file), str(path)) else "indirect"
-                        })
+            # Walked paths are relative while path is resolved
+            own_path = Path(os.path.relpath(path))
+            py_files = [Path(relative) for _, relative in self._iter_python_files('.')]
+            py_files = [py_file for py_file in py_files if py_file != own_path]
+
+            # A file can only import this module if its name appears in the source
+            module_name = path.stem
+            prefilter = lambda content: module_name in content
+            for py_file, (_, tree) in await gather_parsed_files(py_files, prefilter):
+                found = False
+
+                for node in iter_module_imports(tree):
+                    if (isinstance(node, ast.Import) and
+                            any(name.name == module_name for name in node.names)):
+                        found = True
+                        break
+                    elif (isinstance(node, ast.ImportFrom) and
+                          node.module and module_name in node.module):
+                        found = True
+                        break
+
+                if found:
+                    dependents.append({
+                        "file": str(py_file),
+                        "type": "direct" if self.dependency_graph.has_edge(str(py_file), str(path)) else "indirect"
+                    })
 
         except Exception as e:
             logger.error(f"Error finding dependents: {e}")
@@ -154,16 +146,75 @@ class FileDependencyAnalyzer(BaseTool):
         return dependents
 
     async def _detect_cycles(self, path: Path) -> List[List[str]]:
-        """Detect dependency cycles"""
+        """Detect dependency cycles between project files containing path"""
         cycles = []
         try:
-            for cycle in nx.simple_cycles(self.dependency_graph):
-                if str(path) in cycle:
-                    cycles.append(cycle)
+            file_graph = await self._build_file_graph()
+            cycle = file_graph.cycle_of(os.path.relpath(path))
+            if cycle:
+                cycles.append(cycle)
         except Exception as e:
             logger.error(f"Error detecting cycles: {e}")
         return cycles
 
+    async def _build_file_graph(self) -> DependencyGraph:
+        """Import graph over the project's Python files, keyed by relative path"""
+        py_files = [relative for _, relative in self._iter_python_files('.')]
+        signature = await self._run_blocking(files_signature, py_files)
+        if self._file_graph is not None and self._file_graph[0] == signature:
+            return self._file_graph[1]
+
+        modules = {self._module_name(py_file): py_file for py_file in py_files}
+        file_graph = DependencyGraph()
+        for py_file, (_, tree) in await gather_parsed_files(py_files):
+            for target in self._imported_files(py_file, tree, modules):
+                file_graph.add_edge(py_file, target)
+
+        self._file_graph = (signature, file_graph)
+        return file_graph
+
+    @staticmethod
+    def _module_name(py_file: str) -> str:
+        parts = list(Path(py_file).with_suffix('').parts)
+        if parts and parts[-1] == '__init__':
+            parts.pop()
+        return '.'.join(parts)
+
+    def _imported_files(self, py_file: str, tree: ast.Module, modules: Dict[str, str]) -> Set[str]:
+        """Project files imported at module level by py_file"""
+        def resolve(name: str) -> Optional[str]:
+            # The longest imported prefix that is a project module
+            while name:
+                if name in modules:
+                    return modules[name]
+                name = name.rpartition('.')[0]
+            return None
+
+        package = self._module_name(py_file).split('.')
+        if not py_file.endswith('__init__.py'):
+            package = package[:-1]
+
+        targets = set()
+        for node in iter_module_imports(tree):
+            if isinstance(node, ast.Import):
+                targets.update(resolve(alias.name) for alias in node.names)
+                continue
+
+            base = node.module or ''
+            if node.level:
+                keep = len(package) - node.level + 1
+                if keep < 0:
+                    continue
+                base = '.'.join(package[:keep] + ([node.module] if node.module else []))
+
+            # "from pkg import mod" depends on the submodule when one exists
+            for alias in node.names:
+                submodule = f"{base}.{alias.name}" if base else alias.name
+                targets.add(modules[submodule] if submodule in modules else resolve(base))
+
+        targets.discard(None)
+        return targets
+
     async def _calculate_metrics(self, path: Path) -> Dict[str, Any]:
         """Calculate dependency metrics"""
         metrics = {
@@ -174,21 +225,14 @@ class FileDependencyAnalyzer(BaseTool):
         }
 
         try:
-            metrics["fanin"] = len(list(self.dependency_graph.predecessors(str(path))))
-            metrics["fanout"] = len(list(self.dependency_graph.successors(str(path))))
+            metrics["fanin"] = len(self.dependency_graph.predecessors(str(path)))
+            metrics["fanout"] = len(self.dependency_graph.successors(str(path)))
 
             if metrics["fanin"] + metrics["fanout"] > 0:
                 metrics["instability"] = metrics["fanout"] / (metrics["fanin"] + metrics["fanout"])
 
             # Calculate dependency depth
-            depths = []
-            for node in self.dependency_graph.nodes():
-                try:
-                    path_length = nx.shortest_path_length(self.dependency_graph, str(path), node)
-                    depths.append(path_length)
-                except (nx.NetworkXNoPath, nx.NodeNotFound):
-                    continue
-
+            depths = self.dependency_graph.shortest_path_lengths(str(path)).values()
             metrics["dependency_depth"] = max(depths) if depths else 0
 
         except Exception as e:
@@ -198,9 +242,6 @@ class FileDependencyAnalyzer(BaseTool):
 
     def _find_shortest_path(self, source: str, target: str) -> List[str]:
         """Find shortest dependency path between two modules"""
-        try:
-            return nx.shortest_path(self.dependency_graph, source, target)
-        except (nx.NetworkXNoPath, nx.NodeNotFound):
-            return []
+        return self.dependency_graph.shortest_path(source, target)
 
 
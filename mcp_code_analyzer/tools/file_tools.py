@@ -1,6 +1,6 @@
 import asyncio
 
-from .base import BaseTool , safe_read_file
+from .base import BaseTool, clone_file, parse_source, read_source_file, replace_file
 from .logger import LogManager
 import logging
 import shutil
@@ -8,7 +8,6 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Union, List
 import ast
-import astroid
 from pydantic import json
 from radon.complexity import cc_visit
 from radon.metrics import mi_visit
@@ -16,14 +15,26 @@ from radon.raw import analyze
 
 logger = logging.getLogger(__name__)
 
+# Buffered stream writes are batched in memory and appended once this many bytes are pending
+STREAM_FLUSH_SIZE = 64 * 1024
+
 
 class MCPFileOperations(BaseTool):
     """MCP compatible file operations implementation"""
 
+    # Operation name -> handler method, bound once per instance
+    _OPERATIONS = {
+        'analyze': '_analyze_file',
+        'create': '_create_file',
+        'modify': '_modify_file',
+        'stream': '_handle_stream'
+    }
+
     def __init__(self):
         super().__init__()
         self._active_streams = {}
         self._file_locks = {}
+        self._operations = {name: getattr(self, method) for name, method in self._OPERATIONS.items()}
 
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Execute file operations with MCP protocol support"""
@@ -31,21 +42,15 @@ class MCPFileOperations(BaseTool):
         if not operation:
             return {"error": "Operation is required"}
 
-        operations = {
-            'analyze': self._analyze_file,
-            'create': self._create_file,
-            'modify': self._modify_file,
-            'stream': self._handle_stream
-        }
-
-        if operation not in operations:
+        handler = self._operations.get(operation)
+        if handler is None:
             return {
                 "error": f"Unknown operation: {operation}",
-                "available_operations": list(operations.keys())
+                "available_operations": list(self._operations.keys())
             }
 
         try:
-            result = await operations[operation](arguments)
+            result = await handler(arguments)
             return {
                 "success": True,
                 "operation": operation,
@@ -67,6 +72,7 @@ class MCPFileOperations(BaseTool):
             raise ValueError("Path is required for analysis")
 
         path_obj = Path(path)
+        await self._flush_pending_stream(path_obj)
         if not path_obj.exists():
             raise FileNotFoundError(f"File not found: {path}")
 
@@ -142,6 +148,7 @@ class MCPFileOperations(BaseTool):
             raise ValueError("Content is required for modification")
 
         path_obj = Path(path)
+        await self._flush_pending_stream(path_obj)
         if not path_obj.exists():
             raise FileNotFoundError(f"File not found: {path}")
 
@@ -168,12 +175,12 @@ class MCPFileOperations(BaseTool):
                 final_content = content
 
             # Write modified content
-            with path_obj.open('w', encoding='utf-8') as f:
-                f.write(final_content)
+            data = final_content.encode('utf-8')
+            replace_file(path_obj, data)
 
             return {
                 "path": str(path_obj),
-                "size": len(final_content.encode('utf-8')),
+                "size": len(data),
                 "backup_path": str(backup_path),
                 "sections_modified": bool(section)
             }
@@ -239,7 +246,7 @@ class MCPFileOperations(BaseTool):
         """Create backup of existing file"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_path = path.parent / f"{path.stem}_backup_{timestamp}{path.suffix}"
-        shutil.copy2(path, backup_path)
+        clone_file(path, backup_path, metadata=True)
         return backup_path
 
     async def _start_stream(self, path: Path, args: Dict[str, Any]) -> Dict[str, Any]:
@@ -255,7 +262,9 @@ class MCPFileOperations(BaseTool):
 
             self._active_streams[stream_id] = {
                 'started_at': datetime.now().isoformat(),
+                'buffered': bool(args.get('buffered', False)),
                 'buffer': [],
+                'buffered_bytes': 0,
                 'total_bytes': 0,
                 'backup_path': str(backup_path) if backup_path else None
             }
@@ -276,18 +285,45 @@ class MCPFileOperations(BaseTool):
             stream = self._active_streams[stream_id]
 
             try:
-                with path.open('a', encoding='utf-8') as f:
-                    f.write(content)
+                size = len(content.encode('utf-8'))
+                stream['buffer'].append(content)
+                stream['buffered_bytes'] += size
+                stream['total_bytes'] += size
+
+                # Each write reaches the file before returning unless the
+                # stream or this write opted into buffering
+                buffered = args.get('buffered', stream['buffered'])
+                if not buffered or stream['buffered_bytes'] >= STREAM_FLUSH_SIZE:
+                    self._flush_stream(path, stream)
 
-                stream['total_bytes'] += len(content.encode('utf-8'))
                 return {
-                    "bytes_written": len(content.encode('utf-8')),
+                    "bytes_written": size,
                     "total_bytes": stream['total_bytes']
                 }
 
             except Exception as e:
                 raise RuntimeError(f"Stream write failed: {e}")
 
+    def _flush_stream(self, path: Path, stream: Dict[str, Any]) -> None:
+        """Append buffered stream writes to the file in one write"""
+        if not stream['buffer']:
+            return
+        with path.open('a', encoding='utf-8') as f:
+            f.write(''.join(stream['buffer']))
+        stream['buffer'].clear()
+        stream['buffered_bytes'] = 0
+
+    async def _flush_pending_stream(self, path: Path) -> None:
+        """Write out any buffered stream data for path before another operation uses the file"""
+        stream_id = str(path)
+        lock = self._file_locks.get(stream_id)
+        if lock is None:
+            return
+        async with lock:
+            stream = self._active_streams.get(stream_id)
+            if stream is not None:
+                self._flush_stream(path, stream)
+
     async def _finish_stream(self, path: Path) -> Dict[str, Any]:
         """Finish and cleanup stream"""
         stream_id = str(path)
@@ -298,6 +334,8 @@ class MCPFileOperations(BaseTool):
             stream = self._active_streams[stream_id]
 
             try:
+                self._flush_stream(path, stream)
+
                 # Remove backup if exists
                 if stream['backup_path']:
                     backup_path = Path(stream['backup_path'])
@@ -348,8 +386,11 @@ class FileAnalyzer(BaseTool):
                 if not found_path:
                     return {"error": f"File not found: {file_path}"}
 
+            if path.stat().st_size > self.system_config.MAX_FILE_SIZE:
+                return {"error": f"File too large: {path}"}
+
             # Read file content with proper encoding handling
-            content = safe_read_file(str(path))
+            content = await self._run_blocking(read_source_file, path)
             if content is None:
                 return {"error": f"Could not read file: {path}"}
 
@@ -387,10 +428,12 @@ class FileAnalyzer(BaseTool):
                 "content_analysis": {}
             }
 
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
+            content = await self._run_blocking(read_source_file, path)
+            if content is None:
+                result["content_analysis"] = {
+                    "note": "Binary file - content analysis skipped"
+                }
+            else:
                 if path.suffix == '.py':
                     result["metrics"] = self._analyze_python_file(content)
                 elif path.suffix in ['.js', '.jsx']:
@@ -404,10 +447,6 @@ class FileAnalyzer(BaseTool):
                     "last_modified": path.stat().st_mtime,
                 }
 
-            except UnicodeDecodeError:
-                result["content_analysis"] = {
-                    "note": "Binary file - content analysis skipped"
-                }
 
             return result
 
@@ -417,7 +456,7 @@ class FileAnalyzer(BaseTool):
 
     def _analyze_python_file(self, content: str) -> Dict[str, Any]:
         try:
-            tree = ast.parse(content)
+            tree = parse_source(content)
             return {
                 "classes": len([n for n in ast.walk(tree) if isinstance(n, ast.ClassDef)]),
                 "functions": len([n for n in ast.walk(tree) if isinstance(n, ast.FunctionDef)]),
@@ -465,19 +504,20 @@ class FileAnalyzer(BaseTool):
     async def _analyze_quality(self, content: str) -> Dict[str, Any]:
         """Analyze code quality"""
         try:
-            tree = ast.parse(content)
+            tree = parse_source(content)
             quality = {
                 "issues": [],
                 "suggestions": []
             }
 
             for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    if len(node.body) > 50:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    length = node.end_lineno - node.lineno + 1
+                    if length > 50:
                         quality["issues"].append({
                             "type": "long_function",
                             "location": node.lineno,
-                            "message": f"Function {node.name} is too long ({len(node.body)} lines)"
+                            "message": f"Function {node.name} is too long ({length} lines)"
                         })
                     quality["suggestions"].append({
                         "type": "function_doc",
@@ -486,7 +526,7 @@ class FileAnalyzer(BaseTool):
                     }) if not ast.get_docstring(node) else None
 
                 elif isinstance(node, ast.ClassDef):
-                    methods = len([n for n in node.body if isinstance(n, ast.FunctionDef)])
+                    methods = sum(1 for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)))
                     if methods > 10:
                         quality["issues"].append({
                             "type": "complex_class",
@@ -503,16 +543,18 @@ class FileAnalyzer(BaseTool):
     async def _analyze_patterns(self, content: str) -> Dict[str, Any]:
         """Analyze code patterns"""
         try:
-            tree = astroid.parse(content)
+            tree = parse_source(content)
             patterns = {
                 "design_patterns": [],
                 "anti_patterns": [],
                 "code_smells": []
             }
 
-            for class_node in tree.nodes_of_class(astroid.ClassDef):
+            for class_node in (n for n in ast.walk(tree) if isinstance(n, ast.ClassDef)):
+                methods = [n for n in class_node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+
                 # Design patterns
-                if any(method.name == 'get_instance' for method in class_node.methods()):
+                if any(method.name == 'get_instance' for method in methods):
                     patterns["design_patterns"].append({
                         "type": "singleton",
                         "location": class_node.lineno,
@@ -520,7 +562,7 @@ class FileAnalyzer(BaseTool):
                     })
 
                 # Anti-patterns
-                method_count = len(list(class_node.methods()))
+                method_count = len(methods)
                 if method_count > 20:
                     patterns["anti_patterns"].append({
                         "type": "god_class",
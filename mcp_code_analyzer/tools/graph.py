@@ -0,0 +1,216 @@
+from array import array
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+class DependencyGraph:
+    """Compact directed graph over module names.
+
+    Edges are collected as integer pairs and packed lazily into CSR arrays
+    (indptr/indices), so large import graphs cost a few bytes per edge.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._edges: List[Tuple[int, int]] = []
+        self._forward: Optional[Tuple[array, array]] = None
+        self._reverse: Optional[Tuple[array, array]] = None
+        self._cycle_of: Optional[Dict[str, List[str]]] = None
+
+    def _node_id(self, name: str) -> int:
+        node_id = self._ids.get(name)
+        if node_id is None:
+            node_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return node_id
+
+    def add_edge(self, source: str, target: str) -> None:
+        self._edges.append((self._node_id(source), self._node_id(target)))
+        self._forward = self._reverse = None
+        self._cycle_of = None
+
+    def _build_csr(self, reverse: bool = False) -> Tuple[array, array]:
+        """Pack edges into (indptr, indices), dropping duplicate edges"""
+        pairs = sorted(set((t, s) if reverse else (s, t) for s, t in self._edges))
+        indptr = array('i', [0]) * (len(self._names) + 1)
+        indices = array('i', [t for _, t in pairs])
+        for s, _ in pairs:
+            indptr[s + 1] += 1
+        for i in range(len(self._names)):
+            indptr[i + 1] += indptr[i]
+        return indptr, indices
+
+    def _csr(self) -> Tuple[array, array]:
+        if self._forward is None:
+            self._forward = self._build_csr()
+        return self._forward
+
+    def _reverse_csr(self) -> Tuple[array, array]:
+        if self._reverse is None:
+            self._reverse = self._build_csr(reverse=True)
+        return self._reverse
+
+    def nodes(self) -> List[str]:
+        return list(self._names)
+
+    def has_node(self, name: str) -> bool:
+        return name in self._ids
+
+    def _neighbors(self, node_id: int, reverse: bool = False) -> array:
+        indptr, indices = self._reverse_csr() if reverse else self._csr()
+        return indices[indptr[node_id]:indptr[node_id + 1]]
+
+    def successors(self, name: str) -> List[str]:
+        node_id = self._ids.get(name)
+        if node_id is None:
+            return []
+        return [self._names[i] for i in self._neighbors(node_id)]
+
+    def predecessors(self, name: str) -> List[str]:
+        node_id = self._ids.get(name)
+        if node_id is None:
+            return []
+        return [self._names[i] for i in self._neighbors(node_id, reverse=True)]
+
+    def has_edge(self, source: str, target: str) -> bool:
+        if source not in self._ids or target not in self._ids:
+            return False
+        return self._ids[target] in self._neighbors(self._ids[source])
+
+    def dfs_edges(self, source: str) -> List[Tuple[str, str]]:
+        """Tree edges of a depth-first search from source"""
+        if source not in self._ids:
+            return []
+
+        indptr, indices = self._csr()
+        root = self._ids[source]
+        visited = bytearray(len(self._names))
+        visited[root] = 1
+        edges = []
+        stack = [(root, indptr[root])]
+        while stack:
+            v, pos = stack[-1]
+            if pos < indptr[v + 1]:
+                stack[-1] = (v, pos + 1)
+                w = indices[pos]
+                if not visited[w]:
+                    visited[w] = 1
+                    edges.append((self._names[v], self._names[w]))
+                    stack.append((w, indptr[w]))
+            else:
+                stack.pop()
+        return edges
+
+    def _bfs(self, root: int) -> array:
+        """Return the predecessor of each node on a shortest path from root (-1 if unreached)"""
+        indptr, indices = self._csr()
+        parent = array('i', [-1]) * len(self._names)
+        parent[root] = root
+        queue = deque([root])
+        while queue:
+            v = queue.popleft()
+            for w in indices[indptr[v]:indptr[v + 1]]:
+                if parent[w] == -1:
+                    parent[w] = v
+                    queue.append(w)
+        return parent
+
+    def shortest_path(self, source: str, target: str) -> List[str]:
+        """Shortest path from source to target, or an empty list if none exists"""
+        if source not in self._ids or target not in self._ids:
+            return []
+
+        parent = self._bfs(self._ids[source])
+        node = self._ids[target]
+        if parent[node] == -1:
+            return []
+
+        path = [node]
+        while node != parent[node]:
+            node = parent[node]
+            path.append(node)
+        return [self._names[i] for i in reversed(path)]
+
+    def shortest_path_lengths(self, source: str) -> Dict[str, int]:
+        """Distances from source to every reachable node"""
+        if source not in self._ids:
+            return {}
+
+        indptr, indices = self._csr()
+        root = self._ids[source]
+        lengths = {root: 0}
+        queue = deque([root])
+        while queue:
+            v = queue.popleft()
+            for w in indices[indptr[v]:indptr[v + 1]]:
+                if w not in lengths:
+                    lengths[w] = lengths[v] + 1
+                    queue.append(w)
+        return {self._names[i]: length for i, length in lengths.items()}
+
+    def strongly_connected_components(self) -> List[List[str]]:
+        """Iterative Tarjan's algorithm, O(V + E)"""
+        indptr, indices = self._csr()
+        n = len(self._names)
+        index = array('i', [-1]) * n
+        lowlink = array('i', [0]) * n
+        on_stack = bytearray(n)
+        stack: List[int] = []
+        components = []
+        counter = 0
+
+        for root in range(n):
+            if index[root] != -1:
+                continue
+
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, indptr[root])]
+
+            while work:
+                v, pos = work[-1]
+                if pos < indptr[v + 1]:
+                    work[-1] = (v, pos + 1)
+                    w = indices[pos]
+                    if index[w] == -1:
+                        index[w] = lowlink[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = 1
+                        work.append((w, indptr[w]))
+                    elif on_stack[w] and index[w] < lowlink[v]:
+                        lowlink[v] = index[w]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[v] < lowlink[parent]:
+                        lowlink[parent] = lowlink[v]
+
+                if lowlink[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = 0
+                        component.append(self._names[w])
+                        if w == v:
+                            break
+                    components.append(component[::-1])
+
+        return components
+
+    def cycles(self) -> List[List[str]]:
+        """Groups of mutually dependent nodes: SCCs of size >= 2 plus self-loops"""
+        return [
+            component for component in self.strongly_connected_components()
+            if len(component) > 1 or self.has_edge(component[0], component[0])
+        ]
+
+    def cycle_of(self, name: str) -> List[str]:
+        """The cycle containing name, or an empty list; components are computed once per graph"""
+        if self._cycle_of is None:
+            self._cycle_of = {node: cycle for cycle in self.cycles() for node in cycle}
+        return self._cycle_of.get(name, [])
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Dict, Type, Optional, List
+from typing import Any, Awaitable, Callable, Dict, Type, Optional, List
 from .base import BaseTool, logger
 from .file_tools import MCPFileOperations, FileAnalyzer
 from .project_tools import ProjectStructure, ProjectStatistics, ProjectTechnology
@@ -21,8 +21,11 @@ class ToolManager:
     """Manages all available tools"""
 
     def __init__(self):
+        # Tools are constructed on first use; most sessions call only a few
+        self._tool_factories: Dict[str, Callable[[], BaseTool]] = {}
         self._tools: Dict[str, BaseTool] = {}
-        self._code_modifier = CodeModifier()
+        # Bound entry point per tool name, so dispatch is a single lookup
+        self._execute_by_name: Dict[str, Callable[[Dict], Awaitable[Dict[str, Any]]]] = {}
         self._initialize_tools()
 
     def _initialize_tools(self):
@@ -37,7 +40,7 @@ class ToolManager:
         self._register_tool("analyze_file", FileAnalyzer)
 
         # Code Modification Group
-        self._register_tool("code_modifier", lambda: self._code_modifier)
+        self._register_tool("code_modifier", CodeModifier)
 
         # Search and Analysis Group
         self._register_tool("path_finder", PathFinder)
@@ -63,29 +66,37 @@ class ToolManager:
 
     def _register_tool(self, name: str, tool_factory: Type[BaseTool] | callable):
         """Register a tool with factory pattern"""
-        self._tools[name] = tool_factory() if callable(tool_factory) else tool_factory()
+        self._tool_factories[name] = tool_factory
+        # Code modification operations go through the central handler
+        if name == "code_modifier":
+            self._execute_by_name[name] = self._handle_code_modification
 
     async def execute_tool(self, name: str, arguments: Dict) -> Dict:
         """Execute a tool by name with enhanced error handling"""
-        if name not in self._tools:
+        execute = self._execute_by_name.get(name)
+        if execute is None and name not in self._tool_factories:
             return {"error": f"Tool {name} not found"}
 
         try:
-            # Special handling for code modification operations
-            if name == "code_modifier":
-                return await self._handle_code_modification(arguments)
-
-            return await self._tools[name].execute(arguments)
+            if execute is None:
+                execute = self._execute_by_name[name] = self.get_tool(name).execute
+            return await execute(arguments)
         except Exception as e:
             return {"error": str(e)}
 
     def get_tool(self, name: str) -> Optional[BaseTool]:
-        """Get a tool instance by name"""
-        return self._tools.get(name)
+        """Get a tool instance by name, constructing it on first request"""
+        tool = self._tools.get(name)
+        if tool is None:
+            factory = self._tool_factories.get(name)
+            if factory is None:
+                return None
+            tool = self._tools[name] = factory()
+        return tool
 
     def list_tools(self) -> List[str]:
         """List all available tools"""
-        return list(self._tools.keys())
+        return list(self._tool_factories.keys())
 
     async def execute_workflow(self, workflow_type: str, arguments: Dict) -> Dict:
         """Execute a coordinated workflow"""
@@ -114,7 +125,7 @@ class ToolManager:
                     return deps
 
             # Execute modification
-            result = await self._code_modifier.modify_code(
+            result = await self.get_tool("code_modifier").modify_code(
                 file_path=file_path,
                 section=arguments.get('section', {}),
                 new_content=arguments.get('content', ''),
@@ -170,7 +181,7 @@ class ToolManager:
     async def _analyze_dependencies(self, file_path: str, arguments: Dict) -> Dict:
         """Analyze dependencies before modification"""
         try:
-            analyzer = self._tools.get('dependency_analyzer')
+            analyzer = self.get_tool('dependency_analyzer')
             if not analyzer:
                 return {"error": "Dependency analyzer not available"}
 
@@ -1,17 +1,25 @@
+import asyncio
 import json
 import os
 from idlelib.iomenu import encoding
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Set, Union, Tuple
 from datetime import datetime
+import locale
 import logging
+import mmap
 import shutil
 import ast
 import re
 from dataclasses import dataclass
-import tempfile
 import hashlib
 from enum import Enum, auto
+from functools import lru_cache
+from .base import (clone_file, gather_parsed_files, intern_path, iter_python_files,
+                   parse_source, replace_file, run_in_io_pool, source_lines,
+                   source_segment, IO_CONCURRENCY, MMAP_MIN_SIZE,
+                   SOURCE_TREE_CACHE_SIZE)
+from ..config import analysis_config
 
 logger = logging.getLogger(__name__)
 
@@ -56,10 +64,12 @@ class CodeChange:
     hash: str = ""
 
     def __post_init__(self):
-        self.hash = hashlib.sha256(
+        # Identifies the change only, so a short BLAKE2 digest is enough
+        self.hash = hashlib.blake2b(
             f"{self.file_path}:{self.section}:{self.original_content}:{self.new_content}"
-            .encode()
-        ).hexdigest()[:12]
+            .encode(),
+            digest_size=6
+        ).hexdigest()
 
 @dataclass
 class ModificationResult:
@@ -80,6 +90,79 @@ class ValidationResult:
     warnings: List[str]
     details: Dict[str, Any]
 
+@dataclass
+class SourceSummary:
+    """Facts the change analyzers compare between two versions of a source"""
+    node_types: Set[str]
+    imports: Set[str]
+    functions: Dict[str, Dict[str, Any]]
+    classes: Dict[str, Dict[str, Any]]
+    variables: Dict[str, Dict[str, Any]]
+
+def _function_info(node: ast.FunctionDef) -> Dict[str, Any]:
+    return {
+        'name': node.name,
+        'args': len(node.args.args),
+        'defaults': len(node.args.defaults),
+        'kwonly': len(node.args.kwonlyargs),
+        'vararg': bool(node.args.vararg),
+        'kwarg': bool(node.args.kwarg)
+    }
+
+def _class_info(node: ast.ClassDef) -> Dict[str, Any]:
+    return {
+        'name': node.name,
+        'bases': [base.id for base in node.bases if isinstance(base, ast.Name)],
+        'methods': {
+            n.name: {
+                'args': len(n.args.args) - 1,  # Subtract 'self'
+                'decorators': [d.id for d in n.decorator_list if isinstance(d, ast.Name)]
+            }
+            for n in node.body if isinstance(n, ast.FunctionDef)
+        },
+        'properties': [
+            n.name for n in node.body
+            if isinstance(n, ast.FunctionDef) and
+               any(d.id == 'property' for d in n.decorator_list if isinstance(d, ast.Name))
+        ]
+    }
+
+@lru_cache(maxsize=SOURCE_TREE_CACHE_SIZE)
+def summarize_source(content: str) -> SourceSummary:
+    """Collect everything the change analyzers need in one walk of the tree.
+
+    Each analyzer used to walk both versions on its own. Later nodes win
+    for repeated names, as in walk order before. The summary is shared and
+    must be treated as read-only; syntax errors propagate.
+    """
+    summary = SourceSummary(set(), set(), {}, {}, {})
+    for node in ast.walk(parse_source(content)):
+        summary.node_types.add(type(node).__name__)
+
+        if isinstance(node, ast.Import):
+            summary.imports.update(name.name for name in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.module:
+                summary.imports.update(f"{node.module}.{name.name}" for name in node.names)
+        elif isinstance(node, ast.FunctionDef):
+            summary.functions[node.name] = _function_info(node)
+        elif isinstance(node, ast.ClassDef):
+            summary.classes[node.name] = _class_info(node)
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            summary.variables[node.target.id] = {
+                'type': 'annotated',
+                'annotation': ast.unparse(node.annotation) if node.annotation else None,
+                'value': ast.unparse(node.value) if node.value else None
+            }
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    summary.variables[target.id] = {
+                        'type': 'standard',
+                        'value': ast.unparse(node.value)
+                    }
+    return summary
+
 class ModificationError(Exception):
     """Base error for code modifications"""
     def __init__(self, message: str, backup_path: Optional[str] = None):
@@ -103,8 +186,11 @@ class CodeModifier:
         self._backup_dir = self._base_path / "backups" / datetime.now().strftime('%Y%m%d')
         self._temp_dir = self._base_path / "temp"
         self._change_history: List[CodeChange] = []
+        # The same changes grouped by file, in history order
+        self._changes_by_file: Dict[str, List[CodeChange]] = {}
         self._affected_files: Set[str] = set()
         self._cached_asts: Dict[str, ast.AST] = {}
+        self._backups: Dict[str, Tuple[int, int, Path]] = {}
         self._setup_directories()
 
     def _setup_directories(self) -> None:
@@ -130,11 +216,16 @@ class CodeModifier:
             if not self._validate_file(path):
                 raise ValidationError("Invalid file path or file does not exist")
 
+            # One clock reading names the backup and stamps the change
+            now = datetime.now()
+
             # Create backup before any modification
-            backup_path = await self._create_backup(path)
+            backup_path = await self._create_backup(path, now)
+
+            raw = await run_in_io_pool(path.read_bytes)
 
-            # Read and validate file content
-            original_content = self._read_file_content(path)
+            # Decode and validate file content
+            original_content = self._decode_content(path, raw)
             if not original_content:
                 raise ValidationError("Failed to read file content")
 
@@ -145,8 +236,13 @@ class CodeModifier:
             if not self._validate_range(start_line, end_line, len(lines)):
                 raise ValidationError("Invalid line range")
 
+            # Character offsets of the section, so the edit is spliced into
+            # the original text instead of rebuilding it line by line
+            section_start = sum(map(len, lines[:start_line]))
+            section_end = section_start + sum(map(len, lines[start_line:end_line]))
+
             # Extract original section content
-            original_section = ''.join(lines[start_line:end_line])
+            original_section = original_content[section_start:section_end]
 
             # Validate changes if requested
             if validate:
@@ -166,37 +262,30 @@ class CodeModifier:
             )
 
             # Prepare modification
-            new_lines = lines.copy()
-            new_content_lines = new_content.splitlines(keepends=True)
-            new_lines[start_line:end_line] = new_content_lines
-
-            # Create temporary file for modification
-            with tempfile.NamedTemporaryFile(mode='w', delete=False) as tmp:
-                tmp.writelines(new_lines)
-                temp_path = Path(tmp.name)
+            modified_content = ''.join((
+                original_content[:section_start], new_content, original_content[section_end:]
+            ))
 
             # Validate syntax if it's a Python file
             if path.suffix == '.py':
                 try:
-                    with open(temp_path, 'r') as f:
-                        compile(f.read(), temp_path, 'exec')
+                    compile(modified_content, str(path), 'exec')
                 except SyntaxError as e:
-                    temp_path.unlink()
                     raise ValidationError(f"Syntax error in modified code: {str(e)}")
 
             # Apply changes
-            shutil.move(temp_path, path)
+            await run_in_io_pool(replace_file, path, modified_content.encode('utf-8'))
 
             # Create change record
             change = CodeChange(
-                file_path=str(path),
+                file_path=intern_path(path),
                 change_type=ChangeType.MODIFY,
                 section=section,
                 original_content=original_section,
                 new_content=new_content,
                 affected_code=affected_code,
                 metadata={
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': now.isoformat(),
                     'backup_path': str(backup_path),
                     'description': description
                 }
@@ -204,6 +293,7 @@ class CodeModifier:
 
             # Update history
             self._change_history.append(change)
+            self._changes_by_file.setdefault(change.file_path, []).append(change)
             self._affected_files.update(f['file_path'] for f in affected_code)
 
             return ModificationResult(
@@ -283,6 +373,24 @@ class CodeModifier:
         """Analyze impact of code changes"""
         affected_code = []
 
+        # Work out what changed first so every name that needs a project
+        # search can be indexed in a single pass over the files
+        changes: Dict[AnalysisType, List[Dict[str, Any]]] = {}
+        for analysis_type, analyze in (
+                (AnalysisType.IMPORTS, self._analyze_import_changes),
+                (AnalysisType.FUNCTIONS, self._analyze_function_changes),
+                (AnalysisType.CLASSES, self._analyze_class_changes),
+                (AnalysisType.VARIABLES, self._analyze_variable_changes)
+        ):
+            changes[analysis_type] = analyze(original_content, new_content)
+
+        needles = {change['name'] for analysis_type in (
+            AnalysisType.FUNCTIONS, AnalysisType.CLASSES, AnalysisType.VARIABLES
+        ) for change in changes[analysis_type]}
+        for change in changes[AnalysisType.IMPORTS]:
+            needles.update(removed.rpartition('.')[2] for removed in change.get('removed', []))
+        needle_index = await self._build_needle_index(needles, file_path)
+
         # Analyze different aspects
         for analysis_type in AnalysisType:
             try:
@@ -291,7 +399,9 @@ class CodeModifier:
                     file_path,
                     original_content,
                     new_content,
-                    section
+                    section,
+                    changes.get(analysis_type, []),
+                    needle_index
                 )
                 affected_code.extend(affected)
             except Exception as e:
@@ -299,13 +409,78 @@ class CodeModifier:
 
         return affected_code
 
+    async def _build_needle_index(self, needles: Set[str], file_path: Path) -> Dict[str, List[Path]]:
+        """Map each identifier to the project files that mention it as a whole word"""
+        index: Dict[str, List[Path]] = {needle: [] for needle in needles}
+        if not needles:
+            return index
+
+        # Files are searched as raw bytes, so nothing is decoded. Bytes \b only
+        # knows ASCII word characters, so it is applied at ASCII ends only;
+        # the finders re-check every candidate on the AST anyway
+        def alternative(needle: str) -> bytes:
+            encoded = re.escape(needle.encode('utf-8'))
+            head = rb'\b' if needle[0].isascii() else b''
+            tail = rb'\b' if needle[-1].isascii() else b''
+            return head + encoded + tail
+
+        pattern = re.compile(b'|'.join(
+            alternative(needle) for needle in sorted(needles, key=len, reverse=True)
+        ))
+
+        # Files are read and scanned in the shared I/O pool; the semaphore
+        # keeps the number of open files bounded on large trees
+        semaphore = asyncio.Semaphore(IO_CONCURRENCY)
+
+        async def scan(python_file: Path) -> Set[str]:
+            async with semaphore:
+                return await run_in_io_pool(self._scan_file, python_file, pattern)
+
+        # Backup and temp copies of project files would otherwise show up as dependents
+        own_path = file_path.resolve()
+        python_files = [
+            Path(python_file) for python_file, _ in iter_python_files(
+                self._base_path, analysis_config.excluded_dirs, analysis_config.excluded_files,
+                (self._backup_dir.parent, self._temp_dir))
+        ]
+        python_files = [python_file for python_file in python_files if python_file.resolve() != own_path]
+        found = await asyncio.gather(*(scan(python_file) for python_file in python_files))
+
+        for python_file, names in zip(python_files, found):
+            for needle in names:
+                index[needle].append(python_file)
+
+        return index
+
+    def _scan_file(self, python_file: Path, pattern: re.Pattern) -> Set[str]:
+        try:
+            with open(python_file, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < MMAP_MIN_SIZE:
+                    found = set(pattern.findall(f.read()))
+                else:
+                    # Large files are searched in the page cache without copying
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        found = set(pattern.findall(mapped))
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading file {python_file}: {e}")
+            return set()
+        return {match.decode('utf-8') for match in found}
+
+    @staticmethod
+    def _files_containing(needle_index: Dict[str, List[Path]], needle: str) -> List[Path]:
+        """Files in needle_index that mention needle"""
+        return needle_index.get(needle.rpartition('.')[2], [])
+
     async def _analyze_specific_impact(
             self,
             analysis_type: AnalysisType,
             file_path: Path,
             original_content: str,
             new_content: str,
-            section: Dict[str, int]
+            section: Dict[str, int],
+            changes: List[Dict[str, Any]],
+            needle_index: Dict[str, List[Path]]
     ) -> List[AffectedCode]:
         """Analyze specific type of impact"""
         affected = []
@@ -332,46 +507,30 @@ class CodeModifier:
 
         elif analysis_type == AnalysisType.IMPORTS:
             # Changes in imports affect dependent files
-            import_changes = self._analyze_import_changes(
-                original_content,
-                new_content
-            )
-            for change in import_changes:
+            for change in changes:
                 affected.extend(await self._find_import_dependents(
-                    file_path, change
+                    file_path, change, needle_index
                 ))
 
         elif analysis_type == AnalysisType.FUNCTIONS:
             # Function signature changes affect callers
-            func_changes = self._analyze_function_changes(
-                original_content,
-                new_content
-            )
-            for change in func_changes:
+            for change in changes:
                 affected.extend(await self._find_function_callers(
-                    file_path, change
+                    file_path, change, needle_index
                 ))
 
         elif analysis_type == AnalysisType.CLASSES:
             # Class changes affect subclasses and usage
-            class_changes = self._analyze_class_changes(
-                original_content,
-                new_content
-            )
-            for change in class_changes:
+            for change in changes:
                 affected.extend(await self._find_class_dependents(
-                    file_path, change
+                    file_path, change, needle_index
                 ))
 
         elif analysis_type == AnalysisType.VARIABLES:
             # Variable changes affect their usage
-            var_changes = self._analyze_variable_changes(
-                original_content,
-                new_content
-            )
-            for change in var_changes:
+            for change in changes:
                 affected.extend(await self._find_variable_usage(
-                    file_path, change
+                    file_path, change, needle_index
                 ))
 
         return affected
@@ -380,12 +539,8 @@ class CodeModifier:
         """Analyze syntax structure changes"""
         changes = []
         try:
-            original_ast = ast.parse(original)
-            modified_ast = ast.parse(modified)
-
-            # Compare AST structures
-            original_nodes = set(type(node).__name__ for node in ast.walk(original_ast))
-            modified_nodes = set(type(node).__name__ for node in ast.walk(modified_ast))
+            original_nodes = summarize_source(original).node_types
+            modified_nodes = summarize_source(modified).node_types
 
             if original_nodes != modified_nodes:
                 changes.append({
@@ -403,23 +558,8 @@ class CodeModifier:
         """Analyze changes in imports"""
         changes = []
         try:
-            original_ast = ast.parse(original)
-            modified_ast = ast.parse(modified)
-
-            def get_imports(tree: ast.AST) -> Set[str]:
-                imports = set()
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.Import):
-                        for name in node.names:
-                            imports.add(name.name)
-                    elif isinstance(node, ast.ImportFrom):
-                        if node.module:
-                            for name in node.names:
-                                imports.add(f"{node.module}.{name.name}")
-                return imports
-
-            original_imports = get_imports(original_ast)
-            modified_imports = get_imports(modified_ast)
+            original_imports = summarize_source(original).imports
+            modified_imports = summarize_source(modified).imports
 
             if original_imports != modified_imports:
                 changes.append({
@@ -437,30 +577,8 @@ class CodeModifier:
         """Analyze function signature changes"""
         changes = []
         try:
-            original_ast = ast.parse(original)
-            modified_ast = ast.parse(modified)
-
-            def get_function_info(node: ast.FunctionDef) -> Dict[str, Any]:
-                return {
-                    'name': node.name,
-                    'args': len(node.args.args),
-                    'defaults': len(node.args.defaults),
-                    'kwonly': len(node.args.kwonlyargs),
-                    'vararg': bool(node.args.vararg),
-                    'kwarg': bool(node.args.kwarg)
-                }
-
-            original_funcs = {
-                node.name: get_function_info(node)
-                for node in ast.walk(original_ast)
-                if isinstance(node, ast.FunctionDef)
-            }
-
-            modified_funcs = {
-                node.name: get_function_info(node)
-                for node in ast.walk(modified_ast)
-                if isinstance(node, ast.FunctionDef)
-            }
+            original_funcs = summarize_source(original).functions
+            modified_funcs = summarize_source(modified).functions
 
             # Find changed functions
             for name, info in modified_funcs.items():
@@ -481,38 +599,8 @@ class CodeModifier:
         """Analyze class structure changes"""
         changes = []
         try:
-            original_ast = ast.parse(original)
-            modified_ast = ast.parse(modified)
-
-            def get_class_info(node: ast.ClassDef) -> Dict[str, Any]:
-                return {
-                    'name': node.name,
-                    'bases': [base.id for base in node.bases if isinstance(base, ast.Name)],
-                    'methods': {
-                        n.name: {
-                            'args': len(n.args.args) - 1,  # Subtract 'self'
-                            'decorators': [d.id for d in n.decorator_list if isinstance(d, ast.Name)]
-                        }
-                        for n in node.body if isinstance(n, ast.FunctionDef)
-                    },
-                    'properties': [
-                        n.name for n in node.body
-                        if isinstance(n, ast.FunctionDef) and
-                           any(d.id == 'property' for d in n.decorator_list if isinstance(d, ast.Name))
-                    ]
-                }
-
-            original_classes = {
-                node.name: get_class_info(node)
-                for node in ast.walk(original_ast)
-                if isinstance(node, ast.ClassDef)
-            }
-
-            modified_classes = {
-                node.name: get_class_info(node)
-                for node in ast.walk(modified_ast)
-                if isinstance(node, ast.ClassDef)
-            }
+            original_classes = summarize_source(original).classes
+            modified_classes = summarize_source(modified).classes
 
             # Analyze changes
             for name, info in modified_classes.items():
@@ -540,29 +628,8 @@ class CodeModifier:
         """Analyze variable changes including type hints and values"""
         changes = []
         try:
-            original_ast = ast.parse(original)
-            modified_ast = ast.parse(modified)
-
-            def get_variable_info(node: ast.AST) -> Dict[str, Any]:
-                variables = {}
-                for n in ast.walk(node):
-                    if isinstance(n, ast.AnnAssign) and isinstance(n.target, ast.Name):
-                        variables[n.target.id] = {
-                            'type': 'annotated',
-                            'annotation': ast.unparse(n.annotation) if n.annotation else None,
-                            'value': ast.unparse(n.value) if n.value else None
-                        }
-                    elif isinstance(n, ast.Assign):
-                        for target in n.targets:
-                            if isinstance(target, ast.Name):
-                                variables[target.id] = {
-                                    'type': 'standard',
-                                    'value': ast.unparse(n.value)
-                                }
-                return variables
-
-            original_vars = get_variable_info(original_ast)
-            modified_vars = get_variable_info(modified_ast)
+            original_vars = summarize_source(original).variables
+            modified_vars = summarize_source(modified).variables
 
             # Find changed variables
             for name, info in modified_vars.items():
@@ -584,22 +651,21 @@ class CodeModifier:
     async def _find_import_dependents(
             self,
             file_path: Path,
-            import_change: Dict[str, Any]
+            import_change: Dict[str, Any],
+            needle_index: Dict[str, List[Path]]
     ) -> List[AffectedCode]:
         """Find files that depend on changed imports"""
         affected = []
-        search_path = self._base_path
-
-        for python_file in search_path.rglob('*.py'):
-            if python_file == file_path:
-                continue
+        candidates = {
+            python_file
+            for removed in import_change.get('removed', [])
+            for python_file in self._files_containing(needle_index, removed)
+        }
 
+        for python_file, (content, tree) in await gather_parsed_files(sorted(candidates)):
             try:
-                content = self._read_file_content(python_file)
-                if not content:
-                    continue
-
-                tree = ast.parse(content)
+                lines = source_lines(content)
+                file_name = intern_path(python_file)
                 for node in ast.walk(tree):
                     if isinstance(node, (ast.Import, ast.ImportFrom)):
                         imported_names = []
@@ -612,14 +678,14 @@ class CodeModifier:
                         for removed in import_change.get('removed', []):
                             if removed in imported_names:
                                 affected.append(AffectedCode(
-                                    file_path=str(python_file),
+                                    file_path=file_name,
                                     line_range={'start': node.lineno, 'end': node.end_lineno or node.lineno},
                                     change_type='import',
                                     reason=f"Uses removed import '{removed}'",
                                     suggested_action="Update import statement",
                                     severity="high",
                                     reference_type="import",
-                                    original_code=ast.unparse(node)
+                                    original_code=source_segment(lines, node)
                                 ))
 
             except Exception as e:
@@ -630,23 +696,17 @@ class CodeModifier:
     async def _find_function_callers(
             self,
             file_path: Path,
-            function_change: Dict[str, Any]
+            function_change: Dict[str, Any],
+            needle_index: Dict[str, List[Path]]
     ) -> List[AffectedCode]:
         """Find all function calls that need updates"""
         affected = []
-        search_path = self._base_path
         func_name = function_change['name']
 
-        for python_file in search_path.rglob('*.py'):
-            if python_file == file_path:
-                continue
-
+        for python_file, (content, tree) in await gather_parsed_files(self._files_containing(needle_index, func_name)):
             try:
-                content = self._read_file_content(python_file)
-                if not content:
-                    continue
-
-                tree = ast.parse(content)
+                lines = source_lines(content)
+                file_name = intern_path(python_file)
                 for node in ast.walk(tree):
                     if isinstance(node, ast.Call):
                         if (isinstance(node.func, ast.Name) and node.func.id == func_name) or \
@@ -658,14 +718,14 @@ class CodeModifier:
 
                             if current_args != new_required_args:
                                 affected.append(AffectedCode(
-                                    file_path=str(python_file),
+                                    file_path=file_name,
                                     line_range={'start': node.lineno, 'end': node.end_lineno or node.lineno},
                                     change_type='function_call',
                                     reason=f"Call to modified function '{func_name}' needs update",
                                     suggested_action=f"Update call signature ({current_args} args to {new_required_args})",
                                     severity="high",
                                     reference_type="function",
-                                    original_code=ast.unparse(node)
+                                    original_code=source_segment(lines, node)
                                 ))
 
             except Exception as e:
@@ -676,51 +736,45 @@ class CodeModifier:
     async def _find_class_dependents(
             self,
             file_path: Path,
-            class_change: Dict[str, Any]
+            class_change: Dict[str, Any],
+            needle_index: Dict[str, List[Path]]
     ) -> List[AffectedCode]:
         """Find classes that inherit or use the modified class"""
         affected = []
-        search_path = self._base_path
         class_name = class_change['name']
 
-        for python_file in search_path.rglob('*.py'):
-            if python_file == file_path:
-                continue
-
+        for python_file, (content, tree) in await gather_parsed_files(self._files_containing(needle_index, class_name)):
             try:
-                content = self._read_file_content(python_file)
-                if not content:
-                    continue
-
-                tree = ast.parse(content)
+                lines = source_lines(content)
+                file_name = intern_path(python_file)
                 for node in ast.walk(tree):
                     if isinstance(node, ast.ClassDef):
                         # Check inheritance
                         for base in node.bases:
                             if isinstance(base, ast.Name) and base.id == class_name:
                                 affected.append(AffectedCode(
-                                    file_path=str(python_file),
+                                    file_path=file_name,
                                     line_range={'start': node.lineno, 'end': node.end_lineno or node.lineno},
                                     change_type='inheritance',
                                     reason=f"Inherits from modified class '{class_name}'",
                                     suggested_action="Review class changes and update inheritance",
                                     severity="high",
                                     reference_type="class",
-                                    original_code=ast.unparse(node)
+                                    original_code=source_segment(lines, node)
                                 ))
 
                     # Check instantiation and method calls
                     elif isinstance(node, ast.Call):
                         if isinstance(node.func, ast.Name) and node.func.id == class_name:
                             affected.append(AffectedCode(
-                                file_path=str(python_file),
+                                file_path=file_name,
                                 line_range={'start': node.lineno, 'end': node.end_lineno or node.lineno},
                                 change_type='instantiation',
                                 reason=f"Instantiates modified class '{class_name}'",
                                 suggested_action="Review class changes and update instantiation",
                                 severity="medium",
                                 reference_type="class",
-                                original_code=ast.unparse(node)
+                                original_code=source_segment(lines, node)
                             ))
 
             except Exception as e:
@@ -731,35 +785,29 @@ class CodeModifier:
     async def _find_variable_usage(
             self,
             file_path: Path,
-            variable_change: Dict[str, Any]
+            variable_change: Dict[str, Any],
+            needle_index: Dict[str, List[Path]]
     ) -> List[AffectedCode]:
         """Find all uses of the modified variable"""
         affected = []
-        search_path = self._base_path
         var_name = variable_change['name']
 
-        for python_file in search_path.rglob('*.py'):
-            if python_file == file_path:
-                continue
-
+        for python_file, (content, tree) in await gather_parsed_files(self._files_containing(needle_index, var_name)):
             try:
-                content = self._read_file_content(python_file)
-                if not content:
-                    continue
-
-                tree = ast.parse(content)
+                lines = source_lines(content)
+                file_name = intern_path(python_file)
                 for node in ast.walk(tree):
                     if isinstance(node, ast.Name) and node.id == var_name:
                         context = "write" if isinstance(node.ctx, ast.Store) else "read"
                         affected.append(AffectedCode(
-                            file_path=str(python_file),
+                            file_path=file_name,
                             line_range={'start': node.lineno, 'end': node.end_lineno or node.lineno},
                             change_type='variable_usage',
                             reason=f"Uses modified variable '{var_name}' ({context} operation)",
                             suggested_action=f"Review variable changes and update {context} operation",
                             severity="medium",
                             reference_type="variable",
-                            original_code=ast.unparse(node)
+                            original_code=source_segment(lines, node)
                         ))
 
             except Exception as e:
@@ -767,16 +815,25 @@ class CodeModifier:
 
         return affected
 
-    async def _create_backup(self, file_path: Path) -> Path:
-        """Create backup with proper encoding"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_path = self._backup_dir / f"{file_path.stem}_backup_{timestamp}{file_path.suffix}"
+    async def _create_backup(self, file_path: Path, now: datetime) -> Path:
+        """Create backup in the I/O pool, keeping the event loop free"""
+        return await run_in_io_pool(self._backup_file, file_path, now)
+
+    def _backup_file(self, file_path: Path, now: datetime) -> Path:
+        """Copy the file's current content byte for byte.
 
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as src:
-            content = src.read()
-            with open(backup_path, 'w', encoding='utf-8') as dst:
-                dst.write(content)
+        A file that has not changed since its last backup reuses it, so
+        retried or rejected modifications do not copy the file again.
+        """
+        stat = file_path.stat()
+        cached = self._backups.get(str(file_path))
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size) and cached[2].exists():
+            return cached[2]
 
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
+        backup_path = self._backup_dir / f"{file_path.stem}_backup_{timestamp}{file_path.suffix}"
+        clone_file(file_path, backup_path)
+        self._backups[str(file_path)] = (stat.st_mtime_ns, stat.st_size, backup_path)
         return backup_path
 
     def _validate_file(self, file_path: Path) -> bool:
@@ -822,7 +879,7 @@ class CodeModifier:
             # Check for syntax errors in new content
             if file_path.suffix == '.py':
                 try:
-                    ast.parse(new_content)
+                    parse_source(new_content)
                 except SyntaxError as e:
                     errors.append(f"Syntax error: {str(e)}")
                     details['syntax_error'] = str(e)
@@ -880,27 +937,24 @@ class CodeModifier:
 
         return issues
 
-    def _read_file_content(self, file_path: Path) -> Optional[str]:
-        """Safely read file content with encoding detection"""
+    def _decode_content(self, file_path: Path, raw: bytes) -> Optional[str]:
+        """Decode file content with encoding detection"""
         try:
             # Try UTF-8 first
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            text = raw.decode('utf-8')
         except UnicodeDecodeError:
             # Try to detect encoding
             try:
                 import chardet
-                with open(file_path, 'rb') as f:
-                    raw = f.read()
-                detected = chardet.detect(raw)
-                encoding = detected['encoding']
-
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return f.read()
+                encoding = chardet.detect(raw)['encoding'] or locale.getpreferredencoding(False)
+                text = raw.decode(encoding)
             except Exception as e:
                 logger.error(f"Failed to read file {file_path}: {e}")
                 return None
 
+        # Same newline translation as a text-mode read
+        return text.replace('\r\n', '\n').replace('\r', '\n')
+
     async def _restore_backup(self, backup_path: Path, target_path: Path, encoding: str) -> None:
         """Restore from backup with proper encoding"""
         try:
@@ -920,7 +974,7 @@ class CodeModifier:
         changes = self._change_history
 
         if file_path:
-            changes = [c for c in changes if c.file_path == file_path]
+            changes = list(self._changes_by_file.get(file_path, []))
 
         if change_type:
             changes = [c for c in changes if c.change_type == change_type]
@@ -957,4 +1011,5 @@ class CodeModifier:
     def clear_change_history(self) -> None:
         """Clear change history and affected files tracking"""
         self._change_history.clear()
+        self._changes_by_file.clear()
         self._affected_files.clear()
\ No newline at end of file
@@ -1,11 +1,106 @@
 import ast
+import asyncio
 import logging
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, Any, List
-from .base import BaseTool , safe_read_file
+from typing import Dict, Any, List, Optional, Set, Tuple
+from .base import (BaseTool, BoundedCache, files_signature, gather_parsed_files,
+                   load_parsed_file, map_in_process_pool, source_lines, source_segment)
+from .project_index import project_index
 
 logger = logging.getLogger(__name__)
 
+class _PatternCollector(ast.NodeVisitor):
+    """Single pass recording locations, imports, calls and variable uses for a pattern.
+
+    Every named node (function, class, ...) whose name contains the pattern
+    opens a scope for the rest of its subtree; imports are added to every
+    open scope and calls to every open FunctionDef scope.
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.locations: List[Dict[str, Any]] = []
+        self.variables: List[Dict[str, Any]] = []
+        self._scopes: List[Tuple[Set[str], Optional[List[Dict[str, Any]]]]] = []
+        self._open: List[Tuple[Set[str], Optional[List[Dict[str, Any]]]]] = []
+
+    def dependencies(self) -> Dict[str, Any]:
+        return {
+            "imports": [name for imports, _ in self._scopes for name in imports],
+            "functions": [call for _, calls in self._scopes if calls for call in calls],
+            "variables": self.variables
+        }
+
+    def _add_import(self, name: str) -> None:
+        for imports, _ in self._open:
+            imports.add(name)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        self._add_import(node.names[0].name)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        self._add_import(f"{node.module}.{node.names[0].name}")
+
+    @staticmethod
+    def _call_name(func: ast.expr) -> Optional[str]:
+        """Dotted name of a call target: ``f`` or ``a.b.c``; chains on other expressions keep their attributes"""
+        if isinstance(func, ast.Name):
+            return func.id
+        if not isinstance(func, ast.Attribute):
+            return None
+
+        parts = []
+        while isinstance(func, ast.Attribute):
+            parts.append(func.attr)
+            func = func.value
+        if isinstance(func, ast.Name):
+            parts.append(func.id)
+        return '.'.join(reversed(parts))
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if self._open:
+            name = self._call_name(node.func)
+            if name is not None:
+                for _, calls in self._open:
+                    if calls is not None:
+                        calls.append({"name": name, "line": node.lineno})
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if self.pattern in node.id:
+            self.locations.append({
+                "type": "variable",
+                "name": node.id,
+                "line": node.lineno,
+                "context": "assignment" if isinstance(node.ctx, ast.Store) else "usage"
+            })
+            self.variables.append({
+                "name": node.id,
+                "line": node.lineno,
+                "type": type(node.ctx).__name__
+            })
+
+    def generic_visit(self, node: ast.AST) -> None:
+        name = getattr(node, 'name', None)
+        if not (isinstance(name, str) and self.pattern in name):
+            super().generic_visit(node)
+            return
+
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            self.locations.append({
+                "type": "function" if isinstance(node, ast.FunctionDef) else "class",
+                "name": node.name,
+                "line": node.lineno,
+                "end_line": getattr(node, 'end_lineno', node.lineno)
+            })
+
+        scope = (set(), [] if isinstance(node, ast.FunctionDef) else None)
+        self._scopes.append(scope)
+        self._open.append(scope)
+        super().generic_visit(node)
+        self._open.pop()
+
 class PatternDependencyAnalyzer(BaseTool):
     """Analyze dependencies related to code patterns"""
 
@@ -25,15 +120,18 @@ class PatternDependencyAnalyzer(BaseTool):
             return cached
 
         try:
-            content = safe_read_file(str(path))
-            if not content:
-                return {"error": "Could not read file"}
+            parsed = self._get_parsed(path)
+            if not parsed:
+                return {"error": "Could not read or parse file"}
+            content, tree = parsed
 
+            # Locations and dependencies come from the same visitor pass
+            collector = self._collect_pattern(tree, pattern)
             result = {
                 "pattern": pattern,
-                "location": await self._find_pattern_locations(content, pattern),
-                "dependencies": await self._analyze_dependencies(content, pattern),
-                "impact": await self._analyze_impact(content, pattern),
+                "location": collector.locations if collector else [],
+                "dependencies": collector.dependencies() if collector else {},
+                "impact": await self._analyze_impact(content, tree, pattern),
             }
 
             self._cache_result(cache_key, result)
@@ -43,104 +141,20 @@ class PatternDependencyAnalyzer(BaseTool):
             logger.error(f"Error analyzing pattern dependencies: {e}")
             return {"error": str(e)}
 
-    async def _find_pattern_locations(self, content: str, pattern: str) -> List[Dict[str, Any]]:
-        """Find pattern locations in code"""
-        locations = []
+    def _collect_pattern(self, tree: ast.AST, pattern: str) -> Optional[_PatternCollector]:
+        """Find pattern locations and dependencies in one pass"""
         try:
-            tree = ast.parse(content)
-
-            for node in ast.walk(tree):
-                # Check functions
-                if isinstance(node, ast.FunctionDef) and pattern in node.name:
-                    locations.append({
-                        "type": "function",
-                        "name": node.name,
-                        "line": node.lineno,
-                        "end_line": getattr(node, 'end_lineno', node.lineno)
-                    })
-
-                # Check classes
-                elif isinstance(node, ast.ClassDef) and pattern in node.name:
-                    locations.append({
-                        "type": "class",
-                        "name": node.name,
-                        "line": node.lineno,
-                        "end_line": getattr(node, 'end_lineno', node.lineno)
-                    })
-
-                # Check variables
-                elif isinstance(node, ast.Name) and pattern in node.id:
-                    locations.append({
-                        "type": "variable",
-                        "name": node.id,
-                        "line": node.lineno,
-                        "context": "assignment" if isinstance(node.ctx, ast.Store) else "usage"
-                    })
-
-            return locations
+            collector = _PatternCollector(pattern)
+            collector.visit(tree)
+            return collector
 
         except Exception as e:
-            logger.error(f"Error finding pattern locations: {e}")
-            return []
-
-    async def _analyze_dependencies(self, content: str, pattern: str) -> Dict[str, Any]:
-        """Analyze pattern dependencies"""
-        deps = {
-            "imports": [],
-            "functions": [],
-            "variables": []
-        }
-
-        try:
-            tree = ast.parse(content)
-            pattern_nodes = []
-
-            # Find nodes containing pattern
-            for node in ast.walk(tree):
-                if hasattr(node, 'name') and pattern in getattr(node, 'name', ''):
-                    pattern_nodes.append(node)
-                elif isinstance(node, ast.Name) and pattern in node.id:
-                    pattern_nodes.append(node)
-
-            # Analyze each pattern node
-            for node in pattern_nodes:
-                # Find imports
-                imports = set()
-                for n in ast.walk(node):
-                    if isinstance(n, (ast.Import, ast.ImportFrom)):
-                        if isinstance(n, ast.Import):
-                            imports.add(n.names[0].name)
-                        else:
-                            imports.add(f"{n.module}.{n.names[0].name}")
-                deps["imports"].extend(list(imports))
-
-                # Find function calls
-                if isinstance(node, ast.FunctionDef):
-                    for n in ast.walk(node):
-                        if isinstance(n, ast.Call) and isinstance(n.func, ast.Name):
-                            deps["functions"].append({
-                                "name": n.func.id,
-                                "line": n.lineno
-                            })
-
-                # Find variable uses
-                if isinstance(node, ast.Name):
-                    deps["variables"].append({
-                        "name": node.id,
-                        "line": node.lineno,
-                        "type": type(node.ctx).__name__
-                    })
-
-            return deps
-
-        except Exception as e:
-            logger.error(f"Error analyzing dependencies: {e}")
-            return {}
+            logger.error(f"Error analyzing pattern dependencies: {e}")
+            return None
 
-    async def _analyze_impact(self, content: str, pattern: str) -> Dict[str, Any]:
+    async def _analyze_impact(self, content: str, tree: ast.AST, pattern: str) -> Dict[str, Any]:
         """Analyze pattern impact"""
         try:
-            tree = ast.parse(content)
             impact = {
                 "risk_level": "low",
                 "affected_components": [],
@@ -300,12 +314,14 @@ class CodePatternAnalyzer(BaseTool):
             return cached
 
         try:
+            findings = await self._scan_patterns(path)
+            metrics = await self._calculate_pattern_metrics(
+                findings["design_patterns"], findings["anti_patterns"], findings["code_smells"]
+            )
             result = {
-                "design_patterns": await self._find_design_patterns(path),
-                "anti_patterns": await self._find_anti_patterns(path),
-                "code_smells": await self._find_code_smells(path),
-                "metrics": await self._calculate_pattern_metrics(path),
-                "suggestions": await self._generate_pattern_suggestions(path)
+                **findings,
+                "metrics": metrics,
+                "suggestions": await self._generate_pattern_suggestions(metrics)
             }
 
             self._cache_result(cache_key, result)
@@ -315,161 +331,142 @@ class CodePatternAnalyzer(BaseTool):
             logger.error(f"Error analyzing code patterns: {e}")
             return {"error": str(e)}
 
-    def _should_skip(self, path: Path) -> bool:
-        """Check if path should be skipped"""
+    async def _scan_patterns(self, path: Path) -> Dict[str, List[Dict[str, Any]]]:
+        """Scan each Python file once, in worker processes, for every pattern kind"""
+        findings = {
+            "design_patterns": [],
+            "anti_patterns": [],
+            "code_smells": []
+        }
+
         try:
-            if any(excluded in path.parts for excluded in self.analysis_config.excluded_dirs):
-                return True
-            if path.is_file() and any(path.name.endswith(ext) for ext in self.analysis_config.excluded_files):
-                return True
-            return False
-        except:
-            return True
-
-    async def _find_design_patterns(self, path: Path) -> List[Dict[str, Any]]:
+            py_files = [str(py_file) for py_file in self._python_paths(path)]
+            for file_findings in await map_in_process_pool(_scan_pattern_file, py_files):
+                if file_findings:
+                    for kind, items in file_findings.items():
+                        findings[kind].extend(items)
+
+        except Exception as e:
+            logger.error(f"Error scanning code patterns: {e}")
+
+        return findings
+
+    def _find_design_patterns(self, tree: ast.AST, py_file: str) -> List[Dict[str, Any]]:
         """Find common design patterns"""
         patterns = []
 
         try:
-            for py_file in path.rglob('*.py'):
-                if not self._should_skip(py_file):
-                    content = safe_read_file(str(py_file))
-                    if not content:
-                        continue
-
-                    try:
-                        tree = ast.parse(content)
-
-                        for node in ast.walk(tree):
-                            if isinstance(node, ast.ClassDef):
-                                # Singleton Pattern
-                                if self._is_singleton(node):
-                                    patterns.append({
-                                        "type": "singleton",
-                                        "class": node.name,
-                                        "file": str(py_file),
-                                        "line": node.lineno
-                                    })
-
-                                # Factory Pattern
-                                if self._is_factory(node):
-                                    patterns.append({
-                                        "type": "factory",
-                                        "class": node.name,
-                                        "file": str(py_file),
-                                        "line": node.lineno
-                                    })
-
-                                # Observer Pattern
-                                if self._is_observer(node):
-                                    patterns.append({
-                                        "type": "observer",
-                                        "class": node.name,
-                                        "file": str(py_file),
-                                        "line": node.lineno
-                                    })
-
-                    except Exception as e:
-                        logger.error(f"Error analyzing patterns in {py_file}: {e}")
+            for node in ast.walk(tree):
+                if isinstance(node, ast.ClassDef):
+                    # Singleton Pattern
+                    if self._is_singleton(node):
+                        patterns.append({
+                            "type": "singleton",
+                            "class": node.name,
+                            "file": py_file,
+                            "line": node.lineno
+                        })
+
+                    # Factory Pattern
+                    if self._is_factory(node):
+                        patterns.append({
+                            "type": "factory",
+                            "class": node.name,
+                            "file": py_file,
+                            "line": node.lineno
+                        })
+
+                    # Observer Pattern
+                    if self._is_observer(node):
+                        patterns.append({
+                            "type": "observer",
+                            "class": node.name,
+                            "file": py_file,
+                            "line": node.lineno
+                        })
 
         except Exception as e:
-            logger.error(f"Error finding design patterns: {e}")
+            logger.error(f"Error analyzing patterns in {py_file}: {e}")
 
         return patterns
 
-    async def _find_anti_patterns(self, path: Path) -> List[Dict[str, Any]]:
+    def _find_anti_patterns(self, tree: ast.AST, py_file: str) -> List[Dict[str, Any]]:
         """Find code anti-patterns"""
         anti_patterns = []
 
         try:
-            for py_file in path.rglob('*.py'):
-                if not self._should_skip(py_file):
-                    content = safe_read_file(str(py_file))
-                    if not content:
-                        continue
-
-                    try:
-                        tree = ast.parse(content)
-
-                        # God Class
-                        for node in ast.walk(tree):
-                            if isinstance(node, ast.ClassDef):
-                                methods = len([n for n in node.body if isinstance(n, ast.FunctionDef)])
-                                if methods > 20:
-                                    anti_patterns.append({
-                                        "type": "god_class",
-                                        "class": node.name,
-                                        "file": str(py_file),
-                                        "line": node.lineno,
-                                        "method_count": methods
-                                    })
-
-                            # Long Method
-                            elif isinstance(node, ast.FunctionDef):
-                                if len(node.body) > 50:
-                                    anti_patterns.append({
-                                        "type": "long_method",
-                                        "function": node.name,
-                                        "file": str(py_file),
-                                        "line": node.lineno,
-                                        "length": len(node.body)
-                                    })
-
-                    except Exception as e:
-                        logger.error(f"Error analyzing anti-patterns in {py_file}: {e}")
+            # God Class
+            for node in ast.walk(tree):
+                if isinstance(node, ast.ClassDef):
+                    methods = sum(1 for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)))
+                    if methods > 20:
+                        anti_patterns.append({
+                            "type": "god_class",
+                            "class": node.name,
+                            "file": py_file,
+                            "line": node.lineno,
+                            "method_count": methods
+                        })
+
+                # Long Method
+                elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    length = node.end_lineno - node.lineno + 1
+                    if length > 50:
+                        anti_patterns.append({
+                            "type": "long_method",
+                            "function": node.name,
+                            "file": py_file,
+                            "line": node.lineno,
+                            "length": length
+                        })
 
         except Exception as e:
-            logger.error(f"Error finding anti-patterns: {e}")
+            logger.error(f"Error analyzing anti-patterns in {py_file}: {e}")
 
         return anti_patterns
 
-    async def _find_code_smells(self, path: Path) -> List[Dict[str, Any]]:
+    def _find_code_smells(self, tree: ast.AST, py_file: str) -> List[Dict[str, Any]]:
         """Find code smells"""
         smells = []
 
         try:
-            for py_file in path.rglob('*.py'):
-                if not self._should_skip(py_file):
-                    content = safe_read_file(str(py_file))
-                    if not content:
-                        continue
-
-                    try:
-                        tree = ast.parse(content)
-
-                        for node in ast.walk(tree):
-                            # Duplicate Code (simple check)
-                            if isinstance(node, ast.FunctionDef):
-                                body_hash = hash(ast.dump(node))
-                                similar_functions = self._find_similar_functions(tree, node, body_hash)
-                                if similar_functions:
-                                    smells.append({
-                                        "type": "duplicate_code",
-                                        "function": node.name,
-                                        "file": str(py_file),
-                                        "line": node.lineno,
-                                        "similar_to": similar_functions
-                                    })
-
-                            # Too Many Parameters
-                            if isinstance(node, ast.FunctionDef) and len(node.args.args) > 5:
-                                smells.append({
-                                    "type": "too_many_parameters",
-                                    "function": node.name,
-                                    "file": str(py_file),
-                                    "line": node.lineno,
-                                    "param_count": len(node.args.args)
-                                })
+            structures = self._group_by_structure(tree)
+
+            for node in ast.walk(tree):
+                # Duplicate Code (simple check)
+                if isinstance(node, ast.FunctionDef):
+                    similar_functions = [
+                        {"name": other.name, "line": other.lineno}
+                        for other in structures[self._structure_key(node)]
+                        if other.name != node.name
+                    ]
+                    if similar_functions:
+                        smells.append({
+                            "type": "duplicate_code",
+                            "function": node.name,
+                            "file": py_file,
+                            "line": node.lineno,
+                            "similar_to": similar_functions
+                        })
 
-                    except Exception as e:
-                        logger.error(f"Error analyzing code smells in {py_file}: {e}")
+                # Too Many Parameters
+                if isinstance(node, ast.FunctionDef) and len(node.args.args) > 5:
+                    smells.append({
+                        "type": "too_many_parameters",
+                        "function": node.name,
+                        "file": py_file,
+                        "line": node.lineno,
+                        "param_count": len(node.args.args)
+                    })
 
         except Exception as e:
-            logger.error(f"Error finding code smells: {e}")
+            logger.error(f"Error analyzing code smells in {py_file}: {e}")
 
         return smells
 
-    async def _calculate_pattern_metrics(self, path: Path) -> Dict[str, Any]:
+    async def _calculate_pattern_metrics(self, design_patterns: List[Dict[str, Any]],
+                                         anti_patterns: List[Dict[str, Any]],
+                                         code_smells: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculate pattern-related metrics"""
         metrics = {
             "design_pattern_count": 0,
@@ -480,10 +477,6 @@ class CodePatternAnalyzer(BaseTool):
         }
 
         try:
-            design_patterns = await self._find_design_patterns(path)
-            anti_patterns = await self._find_anti_patterns(path)
-            code_smells = await self._find_code_smells(path)
-
             metrics["design_pattern_count"] = len(design_patterns)
             metrics["anti_pattern_count"] = len(anti_patterns)
             metrics["code_smell_count"] = len(code_smells)
@@ -512,13 +505,11 @@ class CodePatternAnalyzer(BaseTool):
 
         return metrics
 
-    async def _generate_pattern_suggestions(self, path: Path) -> List[Dict[str, Any]]:
+    async def _generate_pattern_suggestions(self, metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generate pattern-based suggestions"""
         suggestions = []
 
         try:
-            metrics = await self._calculate_pattern_metrics(path)
-
             # Suggest refactoring for high-risk files
             for file in metrics["highest_risk_files"]:
                 if file["issues"] > 5:
@@ -572,30 +563,44 @@ class CodePatternAnalyzer(BaseTool):
         class_methods = {n.name for n in node.body if isinstance(n, ast.FunctionDef)}
         return bool(observer_methods & class_methods)
 
-    def _find_similar_functions(
-            self,
-            tree: ast.AST,
-            current_node: ast.FunctionDef,
-            current_hash: int
-    ) -> List[Dict[str, Any]]:
-        """Find functions with similar structure"""
-        similar = []
+    def _structure_key(self, node: ast.FunctionDef) -> str:
+        """Dump of a function's signature and body, leaving out its name"""
+        return ast.dump(node.args) + ast.dump(ast.Module(body=node.body, type_ignores=[]))
 
+    def _group_by_structure(self, tree: ast.AST) -> Dict[str, List[ast.FunctionDef]]:
+        """Functions grouped by structure, so duplicates are found in one pass"""
+        groups: Dict[str, List[ast.FunctionDef]] = defaultdict(list)
         for node in ast.walk(tree):
-            if (isinstance(node, ast.FunctionDef) and
-                    node.name != current_node.name and
-                    hash(ast.dump(node)) == current_hash):
-                similar.append({
-                    "name": node.name,
-                    "line": node.lineno
-                })
+            if isinstance(node, ast.FunctionDef):
+                groups[self._structure_key(node)].append(node)
+        return groups
+
+
+def _scan_pattern_file(file_path: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """Collect design patterns, anti-patterns and smells for one file in a worker process"""
+    parsed = load_parsed_file(file_path)
+    if not parsed:
+        return None
 
-        return similar
+    analyzer = CodePatternAnalyzer()
+    tree = parsed[1]
+    return {
+        "design_patterns": analyzer._find_design_patterns(tree, file_path),
+        "anti_patterns": analyzer._find_anti_patterns(tree, file_path),
+        "code_smells": analyzer._find_code_smells(tree, file_path)
+    }
 
 
 class PatternUsageAnalyzer(BaseTool):
     """Find pattern usages and perform pattern analysis"""
 
+    # Occurrence scans kept per (pattern, pattern_type)
+    OCCURRENCE_CACHE_SIZE = 32
+
+    def __init__(self):
+        super().__init__()
+        self._occurrence_cache = BoundedCache(self.OCCURRENCE_CACHE_SIZE)
+
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         pattern = arguments.get('pattern')
         pattern_type = arguments.get('pattern_type', 'all')
@@ -624,75 +629,90 @@ class PatternUsageAnalyzer(BaseTool):
             logger.error(f"Error analyzing pattern usage: {e}")
             return {"error": str(e)}
 
-    def _should_skip(self, path: Path) -> bool:
-        """Check if path should be skipped"""
+    async def _find_occurrences(self, pattern: str, pattern_type: str) -> List[Dict[str, Any]]:
+        """Find pattern occurrences, reusing the last scan while no Python file has changed.
+
+        Statistics, context and suggestions all start from the same
+        occurrences, so one execute would otherwise scan the project five times.
+        Concurrent callers for the same key await a single scan.
+        """
         try:
-            if any(excluded in path.parts for excluded in self.analysis_config.excluded_dirs):
-                return True
-            if path.is_file() and any(path.name.endswith(ext) for ext in self.analysis_config.excluded_files):
-                return True
-            return False
-        except:
-            return True
+            py_files = list(self._python_paths('.'))
+            signature = await self._run_blocking(files_signature, py_files)
+        except Exception as e:
+            logger.error(f"Error finding occurrences: {e}")
+            return []
 
-    async def _find_occurrences(self, pattern: str, pattern_type: str) -> List[Dict[str, Any]]:
+        key = (pattern, pattern_type)
+        cached = self._occurrence_cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return await asyncio.shield(cached[1])
+
+        scan = asyncio.ensure_future(self._scan_occurrences(pattern, pattern_type, py_files))
+        self._occurrence_cache.set(key, (signature, scan))
+        return await asyncio.shield(scan)
+
+    async def _scan_occurrences(self, pattern: str, pattern_type: str,
+                                py_files: List[Path]) -> List[Dict[str, Any]]:
         """Find pattern occurrences"""
         occurrences = []
 
         try:
-            for py_file in Path('.').rglob('*.py'):
-                if not self._should_skip(py_file):
-                    content = safe_read_file(str(py_file))
-                    if not content:
-                        continue
-
-                    try:
-                        tree = ast.parse(content)
-
-                        for node in ast.walk(tree):
-                            occurrence = None
-
-                            if pattern_type in ['all', 'function']:
-                                if isinstance(node, ast.FunctionDef) and pattern in node.name:
-                                    occurrence = {
-                                        "type": "function",
-                                        "name": node.name,
-                                        "line": node.lineno,
-                                        "args": len(node.args.args)
-                                    }
-
-                            if pattern_type in ['all', 'class']:
-                                if isinstance(node, ast.ClassDef) and pattern in node.name:
-                                    occurrence = {
-                                        "type": "class",
-                                        "name": node.name,
-                                        "line": node.lineno,
-                                        "methods": len([m for m in node.body if isinstance(m, ast.FunctionDef)])
-                                    }
-
-                            if pattern_type in ['all', 'variable']:
-                                if isinstance(node, ast.Name) and pattern in node.id:
-                                    occurrence = {
-                                        "type": "variable",
-                                        "name": node.id,
-                                        "line": node.lineno,
-                                        "context": type(node.ctx).__name__
-                                    }
-
-                            if pattern_type in ['all', 'code']:
-                                if isinstance(node, ast.Expr) and pattern in ast.dump(node):
-                                    occurrence = {
-                                        "type": "code",
-                                        "line": node.lineno,
-                                        "content": ast.unparse(node)
-                                    }
-
-                            if occurrence:
-                                occurrence["file"] = str(py_file)
-                                occurrences.append(occurrence)
-
-                    except Exception as e:
-                        logger.error(f"Error analyzing {py_file}: {e}")
+            # Name matches only need files with a matching identifier; 'code'
+            # matches search the AST dump, so they cannot be narrowed this way
+            if pattern_type in ('function', 'class', 'variable'):
+                py_files = await project_index.files_matching(
+                    '.', py_files, lambda name: pattern in name, lambda content: pattern in content)
+
+            for py_file, (content, tree) in await gather_parsed_files(py_files):
+                lines = None
+                try:
+                    for node in ast.walk(tree):
+                        occurrence = None
+
+                        if pattern_type in ['all', 'function']:
+                            if isinstance(node, ast.FunctionDef) and pattern in node.name:
+                                occurrence = {
+                                    "type": "function",
+                                    "name": node.name,
+                                    "line": node.lineno,
+                                    "args": len(node.args.args)
+                                }
+
+                        if pattern_type in ['all', 'class']:
+                            if isinstance(node, ast.ClassDef) and pattern in node.name:
+                                occurrence = {
+                                    "type": "class",
+                                    "name": node.name,
+                                    "line": node.lineno,
+                                    "methods": len([m for m in node.body if isinstance(m, ast.FunctionDef)])
+                                }
+
+                        if pattern_type in ['all', 'variable']:
+                            if isinstance(node, ast.Name) and pattern in node.id:
+                                occurrence = {
+                                    "type": "variable",
+                                    "name": node.id,
+                                    "line": node.lineno,
+                                    "context": type(node.ctx).__name__
+                                }
+
+                        if pattern_type in ['all', 'code']:
+                            if isinstance(node, ast.Expr) and pattern in ast.dump(node):
+                                if lines is None:
+                                    lines = source_lines(content)
+                                occurrence = {
+                                    "type": "code",
+                                    "line": node.lineno,
+                                    "content": source_segment(lines, node)
+                                }
+
+                        if occurrence:
+                            occurrence["file"] = str(py_file)
+                            occurrences.append(occurrence)
+
+                except Exception as e:
+                    logger.error(f"Error analyzing {py_file}: {e}")
 
         except Exception as e:
             logger.error(f"Error finding occurrences: {e}")
@@ -741,11 +761,23 @@ class PatternUsageAnalyzer(BaseTool):
         try:
             occurrences = await self._find_occurrences(pattern, pattern_type)
 
+            # Group by file so each file is split and walked once, however
+            # many occurrences it has
+            by_file: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
             for occ in occurrences:
-                if len(context["usage_examples"]) < 5:  # Limit examples
-                    content = safe_read_file(occ["file"])
-                    if content:
-                        lines = content.splitlines()
+                by_file[occ["file"]].append(occ)
+
+            pattern_co_occurrences = {}
+            for file_path, file_occurrences in by_file.items():
+                parsed = self._get_parsed(file_path)
+                if not parsed:
+                    continue
+                content, tree = parsed
+
+                examples_left = 5 - len(context["usage_examples"])  # Limit examples
+                if examples_left > 0:
+                    lines = content.splitlines()
+                    for occ in file_occurrences[:examples_left]:
                         line_idx = occ["line"] - 1
 
                         # Get context lines
@@ -759,17 +791,18 @@ class PatternUsageAnalyzer(BaseTool):
                             "type": occ["type"]
                         })
 
-            # Find related patterns (patterns that often appear together)
-            pattern_co_occurrences = {}
-            for occ in occurrences:
-                content = safe_read_file(occ["file"])
-                if content:
-                    tree = ast.parse(content)
-                    for node in ast.walk(tree):
-                        if isinstance(node, (ast.Name, ast.FunctionDef, ast.ClassDef)):
-                            name = getattr(node, 'id', getattr(node, 'name', None))
-                            if name and name != pattern:
-                                pattern_co_occurrences[name] = pattern_co_occurrences.get(name, 0) + 1
+                # Find related patterns (patterns that often appear together);
+                # names count once per occurrence in the file
+                file_names = {}
+                for node in ast.walk(tree):
+                    if isinstance(node, (ast.Name, ast.FunctionDef, ast.ClassDef)):
+                        name = getattr(node, 'id', getattr(node, 'name', None))
+                        if name and name != pattern:
+                            file_names[name] = file_names.get(name, 0) + 1
+
+                weight = len(file_occurrences)
+                for name, count in file_names.items():
+                    pattern_co_occurrences[name] = pattern_co_occurrences.get(name, 0) + count * weight
 
             # Get most common co-occurring patterns
             context["related_patterns"] = sorted(
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+from ..config import system_config
+
+logger = logging.getLogger(__name__)
+
+# Bump when cached result layouts change so stale rows are discarded
+SCHEMA_VERSION = 1
+
+# Rows not read for this long are pruned when the store is opened
+MAX_ENTRY_AGE = 30 * 24 * 3600
+
+# Bytes hashed alongside mtime/size to catch edits that preserve both
+DIGEST_PREFIX_SIZE = 4096
+
+def default_cache_path() -> Path:
+    """Cache location, overridable with MCP_CODE_ANALYZER_CACHE_DIR"""
+    cache_dir = os.environ.get("MCP_CODE_ANALYZER_CACHE_DIR")
+    if not cache_dir:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        cache_dir = os.path.join(base, "mcp_code_analyzer")
+    return Path(cache_dir) / "cache.sqlite"
+
+# (mtime_ns, size, leading-bytes digest) a stored result is valid for
+Signature = Tuple[int, int, bytes]
+
+def file_signature(file_path: str) -> Optional[Signature]:
+    """Signature of a file as it is now; take it before reading the content it describes"""
+    try:
+        stat = os.stat(file_path)
+        with open(file_path, 'rb') as f:
+            digest = hashlib.sha1(f.read(DIGEST_PREFIX_SIZE)).digest()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, digest
+
+class PersistentCache:
+    """Per-file analysis results stored in sqlite across server sessions.
+
+    Rows are keyed by absolute path and result kind and are only returned
+    while the file's mtime, size and leading-bytes digest still match.
+    Any sqlite failure disables the cache for the rest of the process, and
+    forked child processes never use it.
+    """
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None):
+        self.db_path = Path(db_path) if db_path else default_cache_path()
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._disabled = not system_config.ENABLE_CACHE
+        self._pid = os.getpid()
+
+    def _forked(self) -> bool:
+        """True in a forked child, which must not use the parent's connection or lock"""
+        return self._pid != os.getpid()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._db is not None or self._disabled:
+            return self._db
+
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.db_path), isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+
+            if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                db.execute("DROP TABLE IF EXISTS file_metrics")
+                db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS file_metrics (
+                    path TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    digest BLOB NOT NULL,
+                    data TEXT NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (path, kind)
+                )
+            """)
+            db.execute("DELETE FROM file_metrics WHERE last_access < ?", (time.time() - MAX_ENTRY_AGE,))
+            self._db = db
+
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Persistent cache unavailable at {self.db_path}: {e}")
+            self._disabled = True
+
+        return self._db
+
+    def get(self, file_path: str, kind: str) -> Optional[Any]:
+        """Return the stored result for an unchanged file, else None"""
+        if self._forked():
+            return None
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return None
+
+            key = os.path.abspath(file_path)
+            signature = file_signature(key)
+            if signature is None:
+                return None
+
+            try:
+                row = db.execute(
+                    "SELECT mtime_ns, size, digest, data FROM file_metrics WHERE path = ? AND kind = ?",
+                    (key, kind)
+                ).fetchone()
+                if row is None or tuple(row[:3]) != signature:
+                    return None
+
+                db.execute(
+                    "UPDATE file_metrics SET last_access = ? WHERE path = ? AND kind = ?",
+                    (time.time(), key, kind)
+                )
+                return json.loads(row[3])
+
+            except (sqlite3.Error, ValueError) as e:
+                logger.warning(f"Persistent cache read failed for {key}: {e}")
+                return None
+
+    def put_many(self, kind: str, results: Iterable[Tuple[str, Optional[Signature], Any]]) -> None:
+        """Store ``(file_path, signature, result)`` triples in one transaction.
+
+        Each signature must be taken with file_signature before the file was
+        read, so a file edited mid-scan is stored under its old signature and
+        is recomputed on the next lookup instead of serving stale results.
+        """
+        if self._forked():
+            return
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return
+
+            now = time.time()
+            rows = []
+            for file_path, signature, result in results:
+                if signature is not None:
+                    rows.append((os.path.abspath(file_path), kind, *signature, json.dumps(result), now))
+            if not rows:
+                return
+
+            try:
+                with db:
+                    db.execute("BEGIN")
+                    db.executemany(
+                        "INSERT OR REPLACE INTO file_metrics "
+                        "(path, kind, mtime_ns, size, digest, data, last_access) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Persistent cache write failed: {e}")
+
+# Shared store used by tools that cache per-file results
+metrics_cache = PersistentCache()
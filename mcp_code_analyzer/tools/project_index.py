@@ -0,0 +1,125 @@
+import ast
+import asyncio
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+from .base import IO_CONCURRENCY, get_parsed_file, run_in_io_pool
+
+logger = logging.getLogger(__name__)
+
+# (mtime_ns, size, identifiers) recorded for one file
+_Entry = Tuple[int, int, FrozenSet[str]]
+
+# Files whose identifiers are kept; least recently listed ones are dropped first
+INDEX_SIZE = 8192
+
+def _identifiers(tree: ast.Module) -> FrozenSet[str]:
+    """Names a file defines or mentions: def/class names and every Name id"""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+    return frozenset(names)
+
+def _load_entry(key: str, known: Optional[_Entry],
+                text_filter: Callable[[str], bool]) -> Optional[_Entry]:
+    """Current entry for a file, or None if it is missing, unparsable or
+    rejected by text_filter; only files that pass the filter are parsed"""
+    try:
+        stat = os.stat(key)
+    except OSError:
+        return None
+    if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+        return known
+
+    parsed = get_parsed_file(key, text_filter)
+    if not parsed:
+        return None
+    return stat.st_mtime_ns, stat.st_size, _identifiers(parsed[1])
+
+class ProjectIndex:
+    """Per-file identifier sets shared by tools across calls.
+
+    Each file is re-read only when its mtime or size changes, so repeated
+    lookups cost a stat per indexed file. Files not yet indexed go through
+    the caller's cheap text check first and are parsed and indexed only if
+    it passes. Trees themselves stay in the AST cache; the index only
+    narrows which files a tool needs to parse and walk.
+    """
+
+    def __init__(self, max_files: int = INDEX_SIZE):
+        self.max_files = max_files
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, root: str, keys: List[str], entries: List[Optional[_Entry]]) -> None:
+        """Record a listing of root; files under root it no longer has are
+        dropped, then the least recently listed files beyond max_files"""
+        with self._lock:
+            for key, entry in zip(keys, entries):
+                if entry is None:
+                    self._entries.pop(key, None)
+                else:
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+
+            prefix = os.path.join(root, '')
+            listed = set(keys)
+            for key in [key for key in self._entries if key.startswith(prefix) and key not in listed]:
+                del self._entries[key]
+            while len(self._entries) > self.max_files:
+                self._entries.popitem(last=False)
+
+    async def _refresh(self, root: Union[str, Path], paths: List[Path],
+                       text_filter: Callable[[str], bool],
+                       limit: int = IO_CONCURRENCY) -> List[Optional[_Entry]]:
+        """Current entry for each path, in order"""
+        keys = [os.path.abspath(path) for path in paths]
+        semaphore = asyncio.Semaphore(limit)
+
+        async def load(key: str) -> Optional[_Entry]:
+            async with semaphore:
+                return await run_in_io_pool(_load_entry, key, self._entries.get(key), text_filter)
+
+        entries = await asyncio.gather(*(load(key) for key in keys))
+        self._store(os.path.abspath(root), keys, entries)
+        return entries
+
+    async def files_with_names(self, root: Union[str, Path], paths: Iterable[Path],
+                               names: Iterable[str]) -> List[Path]:
+        """Paths under root, in input order, whose source mentions any of names as an identifier"""
+        paths = list(paths)
+        names = frozenset(names)
+        entries = await self._refresh(root, paths, lambda content: any(name in content for name in names))
+        return [path for path, entry in zip(paths, entries)
+                if entry is not None and not names.isdisjoint(entry[2])]
+
+    async def files_matching(self, root: Union[str, Path], paths: Iterable[Path],
+                             predicate: Callable[[str], bool],
+                             text_filter: Callable[[str], bool]) -> List[Path]:
+        """Paths under root whose identifiers include one accepted by predicate.
+
+        ``text_filter`` must accept any source that could contain such an
+        identifier; files it rejects are not parsed. The predicate runs once
+        per distinct identifier rather than once per file.
+        """
+        paths = list(paths)
+        entries = await self._refresh(root, paths, text_filter)
+        matched: Dict[str, bool] = {}
+
+        def accepts(name: str) -> bool:
+            result = matched.get(name)
+            if result is None:
+                result = matched[name] = predicate(name)
+            return result
+
+        return [path for path, entry in zip(paths, entries)
+                if entry is not None and any(accepts(name) for name in entry[2])]
+
+# Shared index used by reference and pattern usage lookups
+project_index = ProjectIndex()
@@ -1,8 +1,11 @@
 import json
 import logging
+import os
+from collections import Counter
+from itertools import chain
 from pathlib import Path
-from typing import Dict, Any, List
-from .base import BaseTool
+from typing import Dict, Any, List, AsyncIterator, Iterator, Optional, Tuple
+from .base import BaseTool, iter_directory
 from ..config import analysis_config, system_config
 
 logger = logging.getLogger(__name__)
@@ -36,36 +39,47 @@ class ProjectStructure(BaseTool):
             if not path.exists():
                 return {"error": f"Path does not exist: {path}"}
 
-            def build_tree(current_path: Path, indent: int = 0) -> List[str]:
-                if not current_path.exists() or indent > system_config.MAX_DEPTH:
-                    return []
+            excluded_dirs = self.analysis_config.excluded_dirs
+            excluded_files = self.analysis_config.excluded_files
+
+            def build_tree(current_path: str, indent: int = 0) -> Iterator[str]:
+                """Yield the XML lines for current_path depth-first"""
+                if indent > system_config.MAX_DEPTH:
+                    return
+
+                try:
+                    with os.scandir(current_path) as it:
+                        items = sorted(it, key=lambda x: (not x.is_dir(), x.name.lower()))
+                except OSError:
+                    return
 
-                result = []
-                items = sorted(current_path.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower()))
                 indent_str = '  ' * indent
 
                 for item in items:
-                    if self._should_skip(item):
-                        continue
-
-                    if item.is_dir():
-                        result.append(f"{indent_str}<dir name='{item.name}' path='{item}'>")
-                        result.extend(build_tree(item, indent + 1))
-                        result.append(f"{indent_str}</dir>")
-                    else:
-                        if item.stat().st_size <= system_config.MAX_FILE_SIZE:
-                            ext = item.suffix or 'no_ext'
-                            result.append(
-                                f"{indent_str}<file name='{item.name}' path='{item}' ext='{ext}' analyzable='{ext in analysis_config.analyzable_extensions}'/>"
-                            )
-
-                return result
-
-            xml_lines = [
-                f"<project name='{path.name}' path='{path}'>",
-                *build_tree(path, indent=1),
-                '</project>'
-            ]
+                    try:
+                        if item.is_dir():
+                            if item.name in excluded_dirs:
+                                continue
+                            yield f"{indent_str}<dir name='{item.name}' path='{item.path}'>"
+                            yield from build_tree(item.path, indent + 1)
+                            yield f"{indent_str}</dir>"
+                        else:
+                            ext = os.path.splitext(item.name)[1]
+                            if ext in excluded_files or item.name in excluded_files:
+                                continue
+                            if item.stat().st_size <= system_config.MAX_FILE_SIZE:
+                                ext = ext or 'no_ext'
+                                yield (
+                                    f"{indent_str}<file name='{item.name}' path='{item.path}' ext='{ext}' analyzable='{ext in analysis_config.analyzable_extensions}'/>"
+                                )
+                    except OSError as e:
+                        logger.warning(f"Cannot stat {item.path}: {e}")
+
+            xml_lines = chain(
+                [f"<project name='{path.name}' path='{path}'>"],
+                build_tree(str(path), indent=1),
+                ['</project>']
+            )
 
             return {
                 "structure": {
@@ -98,57 +112,60 @@ class ProjectStatistics(BaseTool):
             logger.error(f"Error collecting project statistics: {e}")
             return {"error": str(e)}
 
+    async def iter_structure(self, path: Path) -> AsyncIterator[Dict[str, Any]]:
+        """Stream project entries one at a time instead of materializing the tree"""
+        for entry, depth, _ in iter_directory(path, self.analysis_config.excluded_dirs,
+                                           self.analysis_config.excluded_files):
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield {"type": "directory", "name": entry.name, "path": entry.path, "depth": depth}
+                elif entry.is_file():
+                    yield {
+                        "type": "file",
+                        "name": entry.name,
+                        "path": entry.path,
+                        "depth": depth,
+                        "ext": os.path.splitext(entry.name)[1] or 'no_ext',
+                        "size": entry.stat().st_size
+                    }
+            except OSError as e:
+                logger.warning(f"Cannot stat {entry.path}: {e}")
+
     async def _collect_statistics(self, path: Path) -> Dict[str, Any]:
         try:
-            stats = {
+            files_by_ext = Counter()
+            size_by_ext = Counter()
+            dirs_by_depth = Counter()
+
+            async for item in self.iter_structure(path):
+                if item["type"] == "directory":
+                    dirs_by_depth[item["depth"]] += 1
+                elif item["size"] <= system_config.MAX_FILE_SIZE:
+                    files_by_ext[item["ext"]] += 1
+                    size_by_ext[item["ext"]] += item["size"]
+
+            total_files = sum(files_by_ext.values())
+            total_size = sum(size_by_ext.values())
+
+            return {
                 "files": {
-                    "total": 0,
-                    "by_extension": {},
-                    "analyzable": 0
+                    "total": total_files,
+                    "by_extension": dict(files_by_ext),
+                    "analyzable": sum(count for ext, count in files_by_ext.items()
+                                      if ext in analysis_config.analyzable_extensions)
                 },
                 "directories": {
-                    "total": 0,
-                    "max_depth": 0,
-                    "by_depth": {}
+                    "total": sum(dirs_by_depth.values()),
+                    "max_depth": max(dirs_by_depth, default=0),
+                    "by_depth": dict(sorted(dirs_by_depth.items()))
                 },
                 "size": {
-                    "total": 0,
-                    "by_extension": {},
-                    "average_file_size": 0
+                    "total": total_size,
+                    "by_extension": dict(size_by_ext),
+                    "average_file_size": total_size / total_files if total_files else 0
                 }
             }
 
-            for item in path.rglob("*"):
-                if not self._should_skip(item):
-                    depth = len(item.relative_to(path).parts)
-
-                    if item.is_dir():
-                        stats["directories"]["total"] += 1
-                        stats["directories"]["max_depth"] = max(stats["directories"]["max_depth"], depth)
-                        stats["directories"]["by_depth"][depth] = stats["directories"]["by_depth"].get(depth, 0) + 1
-
-                    elif item.is_file() and item.stat().st_size <= system_config.MAX_FILE_SIZE:
-                        size = item.stat().st_size
-                        ext = item.suffix or 'no_ext'
-
-                        stats["files"]["total"] += 1
-                        stats["size"]["total"] += size
-
-                        if ext not in stats["files"]["by_extension"]:
-                            stats["files"]["by_extension"][ext] = 0
-                            stats["size"]["by_extension"][ext] = 0
-
-                        stats["files"]["by_extension"][ext] += 1
-                        stats["size"]["by_extension"][ext] += size
-
-                        if ext in analysis_config.analyzable_extensions:
-                            stats["files"]["analyzable"] += 1
-
-            if stats["files"]["total"] > 0:
-                stats["size"]["average_file_size"] = stats["size"]["total"] / stats["files"]["total"]
-
-            return stats
-
         except Exception as e:
             logger.error(f"Error collecting statistics: {e}")
             return {}
@@ -173,6 +190,42 @@ class ProjectTechnology(BaseTool):
             logger.error(f"Error detecting technologies: {e}")
             return {"error": str(e)}
 
+    # Marker files are only looked for this close to the project root
+    MARKER_DEPTH = 2
+
+    # Files whose presence identifies a framework
+    FRAMEWORK_MARKERS = {
+        'manage.py': 'Django',
+        'angular.json': 'Angular',
+        'next.config.js': 'Next.js',
+        'next.config.mjs': 'Next.js',
+        'nest-cli.json': 'NestJS',
+        'vue.config.js': 'Vue.js'
+    }
+
+    # package.json dependencies that identify a framework
+    FRAMEWORK_DEPENDENCIES = {
+        'vue': 'Vue.js',
+        'angular': 'Angular',
+        'next': 'Next.js',
+        'nest': 'NestJS'
+    }
+
+    # Exact file name -> techs and extension -> techs, split once from tech_markers
+    _marker_lookups: Optional[Tuple[Dict[str, List[str]], Dict[str, List[str]]]] = None
+
+    @classmethod
+    def _get_marker_lookups(cls) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        if cls._marker_lookups is None:
+            marker_to_techs: Dict[str, List[str]] = {}
+            ext_to_techs: Dict[str, List[str]] = {}
+            for tech, markers in analysis_config.tech_markers.items():
+                for marker in markers:
+                    lookup = ext_to_techs if marker.startswith('.') else marker_to_techs
+                    lookup.setdefault(marker, []).append(tech)
+            cls._marker_lookups = (marker_to_techs, ext_to_techs)
+        return cls._marker_lookups
+
     async def _detect_technologies(self, path: Path) -> Dict[str, Any]:
         try:
             tech_info = {
@@ -181,43 +234,57 @@ class ProjectTechnology(BaseTool):
                 "languages": set()
             }
 
-            # Scan for technology markers
-            for item in path.rglob("*"):
-                if not self._should_skip(item):
-                    # Check against technology markers
-                    for tech, markers in analysis_config.tech_markers.items():
-                        for marker in markers:
-                            if marker.lower() in str(item).lower():
-                                if tech not in tech_info["detected_techs"]:
-                                    tech_info["detected_techs"][tech] = {
-                                        "markers_found": [],
-                                        "files_count": 0
-                                    }
-                                tech_info["detected_techs"][tech]["markers_found"].append(str(item.name))
-                                tech_info["detected_techs"][tech]["files_count"] += 1
-
-                    # Special handling for framework detection
-                    if item.is_file():
-                        if item.suffix in ['.jsx', '.tsx']:
-                            tech_info["frameworks"].add("React")
-                        elif item.name == 'package.json':
-                            try:
-                                with open(item) as f:
-                                    data = json.load(f)
-                                    deps = {**data.get('dependencies', {}), **data.get('devDependencies', {})}
-
-                                    framework_indicators = {
-                                        'vue': 'Vue.js',
-                                        'angular': 'Angular',
-                                        'next': 'Next.js',
-                                        'nest': 'NestJS'
-                                    }
-
-                                    for indicator, framework in framework_indicators.items():
-                                        if indicator in deps:
-                                            tech_info["frameworks"].add(framework)
-                            except:
-                                continue
+            marker_to_techs, ext_to_techs = self._get_marker_lookups()
+
+            file_types = Counter()
+            marker_files = []
+            for entry, depth, _ in iter_directory(path, self.analysis_config.excluded_dirs,
+                                                  self.analysis_config.excluded_files):
+                if entry.is_dir(follow_symlinks=False):
+                    continue
+                file_types[os.path.splitext(entry.name)[1]] += 1
+                if depth <= self.MARKER_DEPTH:
+                    if entry.name in marker_to_techs:
+                        marker_files.append(entry)
+                    framework = self.FRAMEWORK_MARKERS.get(entry.name)
+                    if framework:
+                        tech_info["frameworks"].add(framework)
+
+            def record(tech: str, marker: str, count: int) -> None:
+                info = tech_info["detected_techs"].setdefault(tech, {
+                    "markers_found": [],
+                    "files_count": 0
+                })
+                if marker not in info["markers_found"]:
+                    info["markers_found"].append(marker)
+                info["files_count"] += count
+
+            # Languages come from source file extensions
+            for ext, techs in ext_to_techs.items():
+                if file_types[ext]:
+                    for tech in techs:
+                        record(tech, ext, file_types[ext])
+                        tech_info["languages"].add(tech)
+
+            for entry in marker_files:
+                for tech in marker_to_techs[entry.name]:
+                    record(tech, entry.name, 1)
+
+                if entry.name == 'package.json':
+                    try:
+                        with open(entry.path) as f:
+                            data = json.load(f)
+                            deps = {**data.get('dependencies', {}), **data.get('devDependencies', {})}
+
+                            for indicator, framework in self.FRAMEWORK_DEPENDENCIES.items():
+                                if indicator in deps:
+                                    tech_info["frameworks"].add(framework)
+                    except:
+                        continue
+
+            # Special handling for framework detection
+            if file_types['.jsx'] or file_types['.tsx']:
+                tech_info["frameworks"].add("React")
 
             # Convert sets to sorted lists for JSON serialization
             tech_info["frameworks"] = sorted(list(tech_info["frameworks"]))
@@ -227,4 +294,4 @@ class ProjectTechnology(BaseTool):
 
         except Exception as e:
             logger.error(f"Error detecting technologies: {e}")
-            return {}
\ No newline at end of file
+            return {}
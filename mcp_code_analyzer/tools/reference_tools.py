@@ -1,12 +1,75 @@
 import ast
+import hashlib
 import logging
-from pathlib import Path
-from typing import Dict, Any, List
-from .base import BaseTool
-from .base import safe_read_file
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate
+from typing import Dict, Any, List, Iterable, Union
+from .base import BaseTool, gather_parsed_files, gather_source_files
+from .project_index import project_index
 
 logger = logging.getLogger(__name__)
 
+# Longest line text returned verbatim in a change preview, and the
+# smallest limit a caller may ask for
+MAX_PREVIEW_CHARS = 4096
+MIN_PREVIEW_CHARS = 64
+
+def _clip_preview(text: str, limit: int) -> Union[str, Dict[str, Any]]:
+    """Text up to limit characters, else its head and tail with length and hash"""
+    if len(text) <= limit:
+        return text
+    half = limit // 2
+    return {
+        "head": text[:half],
+        "tail": text[len(text) - half:],
+        "length": len(text),
+        "hash": hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+    }
+
+class _RefCollector(ast.NodeVisitor):
+    """Collect class, function and variable references to several targets in one pass"""
+
+    def __init__(self, targets: Iterable[str], ref_type: str = 'all'):
+        self.targets = frozenset(targets)
+        self.ref_type = ref_type
+        self.hits: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        if self.ref_type in ('all', 'class'):
+            names = {node.name, *(b.id for b in node.bases if isinstance(b, ast.Name))}
+            for target in names & self.targets:
+                self.hits[target].append({
+                    "type": "class",
+                    "name": node.name,
+                    "line": node.lineno,
+                    "col": node.col_offset,
+                    "kind": "definition" if node.name == target else "inheritance"
+                })
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        if self.ref_type in ('all', 'function') and node.name in self.targets:
+            self.hits[node.name].append({
+                "type": "function",
+                "name": node.name,
+                "line": node.lineno,
+                "col": node.col_offset,
+                "kind": "definition"
+            })
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if self.ref_type in ('all', 'variable') and node.id in self.targets:
+            self.hits[node.id].append({
+                "type": "variable",
+                "name": node.id,
+                "line": node.lineno,
+                "col": node.col_offset,
+                "kind": "assignment" if isinstance(node.ctx, ast.Store) else "usage"
+            })
+
 class PreviewChanges(BaseTool):
     """Preview impact of code changes"""
 
@@ -17,7 +80,12 @@ class PreviewChanges(BaseTool):
         if not pattern or not replacement:
             return {"error": "Both pattern and replacement are required"}
 
-        cache_key = f"preview_{pattern}_{replacement}"
+        try:
+            max_preview = max(MIN_PREVIEW_CHARS, int(arguments.get('max_preview_chars', MAX_PREVIEW_CHARS)))
+        except (TypeError, ValueError, OverflowError):
+            return {"error": "max_preview_chars must be an integer"}
+
+        cache_key = f"preview_{pattern}_{replacement}_{max_preview}"
         if cached := self._get_cached_result(cache_key):
             return cached
 
@@ -25,7 +93,7 @@ class PreviewChanges(BaseTool):
             result = {
                 "original": pattern,
                 "replacement": replacement,
-                "changes": await self._preview_changes(pattern, replacement),
+                "changes": await self._preview_changes(pattern, replacement, max_preview),
                 "impact": await self._analyze_change_impact(pattern, replacement),
                 "safety_analysis": await self._analyze_safety(pattern, replacement)
             }
@@ -38,38 +106,34 @@ class PreviewChanges(BaseTool):
             return {"error": str(e)}
 
 
-    def _should_skip(self, path: Path) -> bool:
-        """Check if path should be skipped"""
-        try:
-            if any(excluded in path.parts for excluded in self.analysis_config.excluded_dirs):
-                return True
-            if path.is_file() and any(path.name.endswith(ext) for ext in self.analysis_config.excluded_files):
-                return True
-            return False
-        except:
-            return True
-
-    async def _preview_changes(self, pattern: str, replacement: str) -> List[Dict[str, Any]]:
-        """Generate preview of changes"""
+    async def _preview_changes(self, pattern: str, replacement: str,
+                               max_preview: int = MAX_PREVIEW_CHARS) -> List[Dict[str, Any]]:
+        """Generate preview of changes; lines longer than max_preview are clipped"""
         changes = []
 
         try:
+            needle = re.compile(re.escape(pattern))
+
             # Analyze current working directory recursively
-            for path in Path('.').rglob('*.py'):
-                if not self._should_skip(path):
-                    content = safe_read_file(str(path))
-                    if content and pattern in content:
-                        # Generate diff for each occurrence
-                        lines = content.splitlines()
-                        for i, line in enumerate(lines, 1):
-                            if pattern in line:
-                                changes.append({
-                                    "file": str(path),
-                                    "line": i,
-                                    "original": line.strip(),
-                                    "modified": line.replace(pattern, replacement).strip(),
-                                    "context": self._get_context(lines, i)
-                                })
+            for path, content in await gather_source_files(self._python_paths('.')):
+                if pattern in content:
+                    # Map each occurrence offset to its line once
+                    lines = content.splitlines()
+                    line_ends = list(accumulate(map(len, content.splitlines(keepends=True))))
+                    last_line = 0
+                    for match in needle.finditer(content):
+                        i = bisect_right(line_ends, match.start()) + 1
+                        if i == last_line or i > len(lines) or pattern not in lines[i - 1]:
+                            continue
+                        last_line = i
+                        line = lines[i - 1]
+                        changes.append({
+                            "file": str(path),
+                            "line": i,
+                            "original": _clip_preview(line.strip(), max_preview),
+                            "modified": _clip_preview(line.replace(pattern, replacement).strip(), max_preview),
+                            "context": self._get_context(lines, i, max_preview=max_preview)
+                        })
 
         except Exception as e:
             logger.error(f"Error previewing changes: {e}")
@@ -118,14 +182,15 @@ class PreviewChanges(BaseTool):
             ]
         }
 
-    def _get_context(self, lines: List[str], current_line: int, context_lines: int = 2) -> Dict[str, List[str]]:
+    def _get_context(self, lines: List[str], current_line: int, context_lines: int = 2,
+                     max_preview: int = MAX_PREVIEW_CHARS) -> Dict[str, List[Any]]:
         """Get context lines around the change"""
         start = max(0, current_line - context_lines - 1)
         end = min(len(lines), current_line + context_lines)
 
         return {
-            "before": lines[start:current_line-1],
-            "after": lines[current_line:end]
+            "before": [_clip_preview(line, max_preview) for line in lines[start:current_line-1]],
+            "after": [_clip_preview(line, max_preview) for line in lines[current_line:end]]
         }
 
 class FindReferences(BaseTool):
@@ -143,11 +208,12 @@ class FindReferences(BaseTool):
             return cached
 
         try:
+            references = await self._find_references(target, ref_type)
             result = {
                 "target": target,
                 "type": ref_type,
-                "references": await self._find_references(target, ref_type),
-                "summary": await self._create_summary(target, ref_type)
+                "references": references,
+                "summary": await self._create_summary(references)
             }
 
             self._cache_result(cache_key, result)
@@ -157,89 +223,41 @@ class FindReferences(BaseTool):
             logger.error(f"Error finding references: {e}")
             return {"error": str(e)}
 
-    def _should_skip(self, path: Path) -> bool:
-        """Check if path should be skipped"""
-        try:
-            if any(excluded in path.parts for excluded in self.analysis_config.excluded_dirs):
-                return True
-            if path.is_file() and any(path.name.endswith(ext) for ext in self.analysis_config.excluded_files):
-                return True
-            return False
-        except:
-            return True
-
     async def _find_references(self, target: str, ref_type: str) -> List[Dict[str, Any]]:
         """Find all references to target"""
-        references = []
+        return (await self._find_references_batch([target], ref_type))[target]
+
+    async def _find_references_batch(self, targets: List[str], ref_type: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Find references to several targets with a single pass over each file"""
+        references = {target: [] for target in targets}
 
         try:
-            for path in Path('.').rglob('*.py'):
-                if not self._should_skip(path):
-                    content = safe_read_file(str(path))
-                    if not content:
-                        continue
+            # Every reference kind matches a Name id or a def/class name, so the
+            # project index narrows the scan to files that mention a target
+            py_files = list(self._python_paths('.'))
+            if all(target.isidentifier() for target in targets):
+                py_files = await project_index.files_with_names('.', py_files, targets)
 
-                    try:
-                        tree = ast.parse(content)
-                        refs = self._analyze_node_references(tree, target, ref_type)
+            for path, (_, tree) in await gather_parsed_files(py_files):
+                try:
+                    collector = _RefCollector(targets, ref_type)
+                    collector.visit(tree)
 
-                        if refs:
-                            for ref in refs:
-                                ref["file"] = str(path)
-                            references.extend(refs)
+                    for target, refs in collector.hits.items():
+                        for ref in refs:
+                            ref["file"] = str(path)
+                        references[target].extend(refs)
 
-                    except Exception as e:
-                        logger.error(f"Error parsing {path}: {e}")
+                except Exception as e:
+                    logger.error(f"Error parsing {path}: {e}")
 
         except Exception as e:
             logger.error(f"Error finding references: {e}")
 
         return references
 
-    def _analyze_node_references(self, tree: ast.AST, target: str, ref_type: str) -> List[Dict[str, Any]]:
-        """Analyze AST node for references"""
-        refs = []
-
-        for node in ast.walk(tree):
-            # Class references
-            if ref_type in ['all', 'class'] and isinstance(node, ast.ClassDef):
-                if target in [node.name, *[b.id for b in node.bases if isinstance(b, ast.Name)]]:
-                    refs.append({
-                        "type": "class",
-                        "name": node.name,
-                        "line": node.lineno,
-                        "col": node.col_offset,
-                        "kind": "definition" if node.name == target else "inheritance"
-                    })
-
-            # Function references
-            elif ref_type in ['all', 'function'] and isinstance(node, ast.FunctionDef):
-                if target == node.name:
-                    refs.append({
-                        "type": "function",
-                        "name": node.name,
-                        "line": node.lineno,
-                        "col": node.col_offset,
-                        "kind": "definition"
-                    })
-
-            # Variable references
-            elif ref_type in ['all', 'variable'] and isinstance(node, ast.Name):
-                if target == node.id:
-                    refs.append({
-                        "type": "variable",
-                        "name": node.id,
-                        "line": node.lineno,
-                        "col": node.col_offset,
-                        "kind": "assignment" if isinstance(node.ctx, ast.Store) else "usage"
-                    })
-
-        return refs
-
-    async def _create_summary(self, target: str, ref_type: str) -> Dict[str, Any]:
+    async def _create_summary(self, refs: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Create reference summary"""
-        refs = await self._find_references(target, ref_type)
-
         summary = {
             "total_references": len(refs),
             "by_type": {},
@@ -1,11 +1,14 @@
 import logging
+import os
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, FrozenSet
 from datetime import datetime
 import re
+from bisect import bisect_right
+from itertools import accumulate
 from dataclasses import dataclass
 import fnmatch
-from .base import BaseTool
+from .base import BaseTool, BoundedCache
 
 logger = logging.getLogger(__name__)
 
@@ -25,18 +28,20 @@ class PathFinder(BaseTool):
         search_path = arguments.get('path', '.')
         operation = arguments.get('operation', 'find')
 
-        operations = {
-            'find': self._find_files,
-            'glob': self._glob_search,
-            'pattern': self._pattern_search,
-            'recent': self._find_recent
-        }
-
-        if operation not in operations:
-            return {"error": f"Unknown operation: {operation}"}
+        match operation:
+            case 'find':
+                handler = self._find_files
+            case 'glob':
+                handler = self._glob_search
+            case 'pattern':
+                handler = self._pattern_search
+            case 'recent':
+                handler = self._find_recent
+            case _:
+                return {"error": f"Unknown operation: {operation}"}
 
         try:
-            result = await operations[operation](Path(search_path), arguments)
+            result = await handler(Path(search_path), arguments)
             return {"success": True, "data": result}
         except Exception as e:
             logger.error(f"PathFinder operation failed: {e}")
@@ -211,7 +216,10 @@ class PathFinder(BaseTool):
     def _walk_with_depth(self, path: Path, max_depth: Optional[int] = None):
         """Walk directory tree with optional depth limit"""
         base_depth = len(path.parents)
-        for root, dirs, files in path.walk():
+        excluded_dirs = self.analysis_config.excluded_dirs
+        for root, dirs, files in os.walk(path):
+            # Prune excluded directories before os.walk descends into them
+            dirs[:] = [d for d in dirs if d not in excluded_dirs]
             current_depth = len(Path(root).parents) - base_depth
             if max_depth is not None and current_depth > max_depth:
                 dirs.clear()
@@ -285,25 +293,28 @@ class ContentScanner(BaseTool):
 
     def __init__(self):
         super().__init__()
-        self._file_cache = {}
+        self._file_cache = BoundedCache(self.system_config.FILE_CACHE_SIZE,
+                                        ttl=self.system_config.FILE_CACHE_TTL)
         self.max_workers = 4
 
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         operation = arguments.get('operation', 'search')
         target_path = arguments.get('path', '.')
 
-        operations = {
-            'search': self._search_content,
-            'analyze': self._analyze_content,
-            'regex': self._regex_search,
-            'similar': self._find_similar
-        }
-
-        if operation not in operations:
-            return {"error": f"Unknown operation: {operation}"}
+        match operation:
+            case 'search':
+                handler = self._search_content
+            case 'analyze':
+                handler = self._analyze_content
+            case 'regex':
+                handler = self._regex_search
+            case 'similar':
+                handler = self._find_similar
+            case _:
+                return {"error": f"Unknown operation: {operation}"}
 
         try:
-            result = await operations[operation](Path(target_path), arguments)
+            result = await handler(Path(target_path), arguments)
             return {"success": True, "data": result}
         except Exception as e:
             logger.error(f"ContentScanner operation failed: {e}")
@@ -332,6 +343,8 @@ class ContentScanner(BaseTool):
 
             flags = 0 if case_sensitive else re.IGNORECASE
             regex = re.compile(pattern, flags)
+            # A literal without line breaks can be found in the whole content at once
+            single_line = search_text.splitlines() == [search_text]
 
             # Search files
             for file_path in path.rglob(file_pattern):
@@ -341,7 +354,7 @@ class ContentScanner(BaseTool):
                 total_files += 1
 
                 try:
-                    matches = await self._find_matches(file_path, regex)
+                    matches = await self._find_matches(file_path, regex, single_line)
                     if matches:
                         matches_found += len(matches)
                         results.append({
@@ -466,6 +479,9 @@ class ContentScanner(BaseTool):
                 similar_files = []
                 for file2, hash2 in content_hashes.items():
                     if file1 != file2 and file2 not in analyzed_files:
+                        # Skip the intersection when sizes alone rule the pair out
+                        if self._similarity_upper_bound(hash1, hash2) < threshold:
+                            continue
                         similarity = self._calculate_hash_similarity(hash1, hash2)
                         if similarity >= threshold:
                             similar_files.append({
@@ -493,22 +509,45 @@ class ContentScanner(BaseTool):
         except Exception as e:
             raise RuntimeError(f"Similarity analysis failed: {e}")
 
-    async def _find_matches(self, file_path: Path, pattern: re.Pattern) -> List[Dict[str, Any]]:
-        """Find pattern matches in file"""
+    async def _find_matches(self, file_path: Path, pattern: re.Pattern,
+                            single_line: bool = False) -> List[Dict[str, Any]]:
+        """Find pattern matches in file.
+
+        Patterns are matched line by line. With ``single_line`` the caller
+        guarantees the pattern can neither span nor anchor on a line break,
+        so one finditer over the whole content finds the same matches and
+        line numbers are recovered by bisecting the line start offsets.
+        """
         matches = []
         try:
             content = await self._read_file_content(file_path)
             if not content:
                 return matches
 
-            for i, line in enumerate(content.splitlines(), 1):
+            lines = content.splitlines()
+
+            if single_line:
+                line_starts = list(accumulate(map(len, content.splitlines(keepends=True)), initial=0))
+                for match in pattern.finditer(content):
+                    i = bisect_right(line_starts, match.start())
+                    offset = line_starts[i - 1]
+                    matches.append({
+                        "line": i,
+                        "start": match.start() - offset,
+                        "end": match.end() - offset,
+                        "text": match.group(),
+                        "context": self._get_line_context(lines, i)
+                    })
+                return matches
+
+            for i, line in enumerate(lines, 1):
                 for match in pattern.finditer(line):
                     matches.append({
                         "line": i,
                         "start": match.start(),
                         "end": match.end(),
                         "text": match.group(),
-                        "context": self._get_line_context(content.splitlines(), i)
+                        "context": self._get_line_context(lines, i)
                     })
 
         except Exception as e:
@@ -519,7 +558,8 @@ class ContentScanner(BaseTool):
     async def _find_duplicate_content(self, path: Path, pattern: str) -> Dict[str, Any]:
         """Find duplicate content across files"""
         content_map = {}
-        duplicates = []
+        # One group per content hash, in the order duplicates are first seen
+        groups: Dict[str, Dict[str, Any]] = {}
 
         try:
             for file_path in path.rglob(pattern):
@@ -533,18 +573,17 @@ class ContentScanner(BaseTool):
                 content_hash = self._calculate_content_hash(content)
                 if content_hash in content_map:
                     # Found a duplicate
-                    if content_map[content_hash] not in duplicates:
-                        duplicates.append({
+                    group = groups.get(content_hash)
+                    if group is None:
+                        group = groups[content_hash] = {
                             "original": content_map[content_hash],
                             "duplicates": []
-                        })
-
-                    for group in duplicates:
-                        if group["original"] == content_map[content_hash]:
-                            group["duplicates"].append(str(file_path))
+                        }
+                    group["duplicates"].append(str(file_path))
                 else:
                     content_map[content_hash] = str(file_path)
 
+            duplicates = list(groups.values())
             return {
                 "duplicate_groups": duplicates,
                 "total_duplicates": sum(len(group["duplicates"]) for group in duplicates)
@@ -584,9 +623,10 @@ class ContentScanner(BaseTool):
                 ext = file_path.suffix
                 stats["file_types"][ext] = stats["file_types"].get(ext, 0) + 1
 
-                content = await self._read_file_content(file_path)
-                if not content:
+                loaded = await self._read_file(file_path)
+                if not loaded or not loaded[0]:
                     continue
+                content, encoding = loaded
 
                 lines = content.splitlines()
                 stats["total_lines"] += len(lines)
@@ -601,7 +641,6 @@ class ContentScanner(BaseTool):
                     stats["line_endings"]["unix"] += 1
 
                 # Track encoding
-                encoding = self._detect_encoding(file_path)
                 stats["encoding_types"][encoding] = stats["encoding_types"].get(encoding, 0) + 1
 
             if line_lengths:
@@ -650,7 +689,7 @@ class ContentScanner(BaseTool):
 
                 # Analyze structure patterns
                 if file_path.suffix == '.py':
-                    await self._analyze_python_patterns(content, patterns)
+                    await self._analyze_python_patterns(file_path, patterns)
 
             # Process word frequencies
             patterns["common_words"] = dict(sorted(
@@ -669,25 +708,39 @@ class ContentScanner(BaseTool):
 
     async def _read_file_content(self, path: Path) -> Optional[str]:
         """Read file content with caching"""
-        if str(path) in self._file_cache:
-            return self._file_cache[str(path)]
+        loaded = await self._read_file(path)
+        return loaded[0] if loaded else None
+
+    async def _read_file(self, path: Path) -> Optional[Tuple[str, str]]:
+        """Read ``(content, encoding)`` in the I/O pool, caching both"""
+        key = str(path)
+        loaded = self._file_cache.get(key)
+        if loaded is not None:
+            return loaded
 
         try:
-            content = path.read_text(encoding=self._detect_encoding(path))
-            self._file_cache[str(path)] = content
-            return content
+            loaded = await self._run_blocking(self._load_text, path)
+            self._file_cache.set(key, loaded)
+            return loaded
         except Exception as e:
             logger.error(f"Error reading {path}: {e}")
             return None
 
-    def _detect_encoding(self, path: Path) -> str:
-        """Detect file encoding"""
+    def _load_text(self, path: Path) -> Tuple[str, str]:
+        """Read a file once and decode it with its detected encoding"""
+        with open(path, 'rb') as f:
+            raw = f.read()
+        encoding = self._detect_encoding(raw)
+        # Same newline translation as a text-mode read
+        text = raw.decode(encoding).replace('\r\n', '\n').replace('\r', '\n')
+        return text, encoding
+
+    def _detect_encoding(self, raw: bytes) -> str:
+        """Detect encoding of raw file content"""
         try:
             import chardet
-            with open(path, 'rb') as f:
-                raw = f.read()
-                result = chardet.detect(raw)
-                return result['encoding'] or 'utf-8'
+            result = chardet.detect(raw)
+            return result['encoding'] or 'utf-8'
         except Exception:
             return 'utf-8'
 
@@ -696,16 +749,27 @@ class ContentScanner(BaseTool):
         import hashlib
         return hashlib.md5(content.encode()).hexdigest()
 
-    def _calculate_similarity_hash(self, content: str) -> List[int]:
-        """Calculate similarity hash for content"""
+    def _calculate_similarity_hash(self, content: str) -> Tuple[FrozenSet[int], int]:
+        """Calculate similarity hash for content: distinct word hashes and word count"""
         # Simplified implementation of similarity hashing
         words = content.split()
-        return [hash(word) for word in words]
+        return frozenset(hash(word) for word in words), len(words)
 
-    def _calculate_hash_similarity(self, hash1: List[int], hash2: List[int]) -> float:
+    def _calculate_hash_similarity(self, hash1: Tuple[FrozenSet[int], int],
+                                   hash2: Tuple[FrozenSet[int], int]) -> float:
         """Calculate similarity between two hashes"""
-        common = set(hash1) & set(hash2)
-        return len(common) / max(len(hash1), len(hash2))
+        longest = max(hash1[1], hash2[1])
+        if not longest:
+            return 0.0
+        return len(hash1[0] & hash2[0]) / longest
+
+    def _similarity_upper_bound(self, hash1: Tuple[FrozenSet[int], int],
+                                hash2: Tuple[FrozenSet[int], int]) -> float:
+        """Best similarity the pair could reach, from set sizes alone"""
+        longest = max(hash1[1], hash2[1])
+        if not longest:
+            return 0.0
+        return min(len(hash1[0]), len(hash2[0])) / longest
 
     def _get_line_context(self, lines: List[str], line_number: int, context_lines: int = 2) -> Dict[str, List[str]]:
         """Get context lines around a match"""
@@ -716,11 +780,14 @@ class ContentScanner(BaseTool):
             "after": lines[line_number:end]
         }
 
-    async def _analyze_python_patterns(self, content: str, patterns: Dict[str, Any]) -> None:
+    async def _analyze_python_patterns(self, file_path: Path, patterns: Dict[str, Any]) -> None:
         """Analyze Python-specific patterns"""
         import ast
         try:
-            tree = ast.parse(content)
+            parsed = await self._run_blocking(self._get_parsed, file_path)
+            if not parsed:
+                return
+            tree = parsed[1]
 
             # Analyze structure patterns
             class_patterns = []
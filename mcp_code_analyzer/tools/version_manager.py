@@ -5,11 +5,15 @@ from datetime import datetime
 import json
 import shutil
 import hashlib
+from collections import Counter
 from dataclasses import dataclass
-from .base import BaseTool
+from .base import BaseTool, clone_file, dumps_json, intern_path
 
 logger = logging.getLogger(__name__)
 
+# Read size for file hashing; one buffer per manager is reused for every read
+HASH_BUFFER_SIZE = 1024 * 1024
+
 @dataclass
 class Version:
     """Version information container"""
@@ -30,12 +34,24 @@ class ChangeInfo:
 class VersionManager(BaseTool):
     """Advanced version control and change tracking tool"""
 
+    # Operation name -> handler method, bound once per instance
+    _OPERATIONS = {
+        'create_version': '_create_version',
+        'restore_version': '_restore_version',
+        'get_history': '_get_version_history',
+        'compare_versions': '_compare_versions',
+        'get_changes': '_get_changes',
+        'cleanup': '_cleanup_versions'
+    }
+
     def __init__(self):
         super().__init__()
         self._version_store = {}
         self._change_history = {}
         self._backup_root = Path('backups')
         self._metadata_file = self._backup_root / 'version_metadata.json'
+        self._hash_buffer = bytearray(HASH_BUFFER_SIZE)
+        self._operations = {name: getattr(self, method) for name, method in self._OPERATIONS.items()}
         self._initialize_storage()
 
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -45,20 +61,12 @@ class VersionManager(BaseTool):
         if not target_path:
             return {"error": "Path is required"}
 
-        operations = {
-            'create_version': self._create_version,
-            'restore_version': self._restore_version,
-            'get_history': self._get_version_history,
-            'compare_versions': self._compare_versions,
-            'get_changes': self._get_changes,
-            'cleanup': self._cleanup_versions
-        }
-
-        if operation not in operations:
+        handler = self._operations.get(operation)
+        if handler is None:
             return {"error": f"Unknown operation: {operation}"}
 
         try:
-            result = await operations[operation](Path(target_path), arguments)
+            result = await handler(Path(target_path), arguments)
             return {"success": True, "data": result}
         except Exception as e:
             logger.error(f"VersionManager operation failed: {e}")
@@ -69,7 +77,7 @@ class VersionManager(BaseTool):
         try:
             self._backup_root.mkdir(parents=True, exist_ok=True)
             if self._metadata_file.exists():
-                metadata = json.loads(self._metadata_file.read_text())
+                metadata = json.loads(self._metadata_file.read_text(encoding='utf-8'))
                 self._version_store = metadata.get('versions', {})
                 self._change_history = metadata.get('changes', {})
             else:
@@ -85,7 +93,7 @@ class VersionManager(BaseTool):
                 'changes': self._change_history,
                 'last_updated': datetime.now().isoformat()
             }
-            self._metadata_file.write_text(json.dumps(metadata, indent=2))
+            self._metadata_file.write_text(dumps_json(metadata, indent=True), encoding='utf-8')
         except Exception as e:
             logger.error(f"Failed to save metadata: {e}")
 
@@ -111,8 +119,9 @@ class VersionManager(BaseTool):
                     }
 
             # Create version ID
-            version_id = self._generate_version_id(path)
-            timestamp = datetime.now().isoformat()
+            now = datetime.now()
+            version_id = self._generate_version_id(path, now, file_hash)
+            timestamp = now.isoformat()
 
             # Create backup
             backup_path = self._create_backup(path, version_id)
@@ -296,20 +305,24 @@ class VersionManager(BaseTool):
 
             # Apply filters
             change_type = args.get('type')
+            # Parse the date bounds once rather than for every change
             start_date = args.get('start_date')
+            start_date = datetime.fromisoformat(start_date) if start_date else None
             end_date = args.get('end_date')
+            end_date = datetime.fromisoformat(end_date) if end_date else None
 
             for change in changes:
                 if change_type and change.type != change_type:
                     continue
 
-                change_date = datetime.fromisoformat(change.timestamp)
+                if start_date or end_date:
+                    change_date = datetime.fromisoformat(change.timestamp)
 
-                if start_date and change_date < datetime.fromisoformat(start_date):
-                    continue
+                    if start_date and change_date < start_date:
+                        continue
 
-                if end_date and change_date > datetime.fromisoformat(end_date):
-                    continue
+                    if end_date and change_date > end_date:
+                        continue
 
                 filtered_changes.append(change)
 
@@ -352,12 +365,13 @@ class VersionManager(BaseTool):
                 kept_versions = versions[-keep_latest:]
                 versions_to_delete.extend(versions[:-keep_latest])
 
-            # Process remaining versions
-            for version in versions_to_delete[:]:
+            # Process remaining versions, keeping those newer than the cutoff;
+            # one partition pass instead of a list.remove per kept version
+            expired = []
+            for version in versions_to_delete:
                 version_date = datetime.fromisoformat(version.timestamp).timestamp()
-                if version_date > cutoff_date:
-                    versions_to_delete.remove(version)
-                    kept_versions.append(version)
+                (kept_versions if version_date > cutoff_date else expired).append(version)
+            versions_to_delete = expired
 
             # Delete versions
             for version in versions_to_delete:
@@ -387,18 +401,20 @@ class VersionManager(BaseTool):
         except Exception as e:
             raise RuntimeError(f"Failed to clean up versions: {e}")
 
-    def _generate_version_id(self, path: Path) -> str:
-        """Generate unique version ID"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_data = f"{path}:{timestamp}:{self._calculate_file_hash(path)}"
+    def _generate_version_id(self, path: Path, now: datetime, file_hash: str) -> str:
+        """Generate unique version ID from the already computed content hash"""
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
+        unique_data = f"{path}:{timestamp}:{file_hash}"
         return hashlib.md5(unique_data.encode()).hexdigest()[:12]
 
     def _calculate_file_hash(self, path: Path) -> str:
         """Calculate file hash"""
         hasher = hashlib.sha256()
-        with open(path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b''):
-                hasher.update(chunk)
+        view = memoryview(self._hash_buffer)
+        # Unbuffered reads land directly in the reused buffer
+        with open(path, 'rb', buffering=0) as f:
+            while size := f.readinto(view):
+                hasher.update(view[:size])
         return hasher.hexdigest()
 
     def _create_backup(self, path: Path, version_id: str) -> Path:
@@ -407,16 +423,13 @@ class VersionManager(BaseTool):
         backup_dir.mkdir(parents=True, exist_ok=True)
 
         backup_path = backup_dir / f"{version_id}{path.suffix}"
-        shutil.copy2(path, backup_path)
+        clone_file(path, backup_path, metadata=True)
 
         return backup_path
 
     def _add_version(self, path: Path, version: Version) -> None:
         """Add version to store"""
-        if str(path) not in self._version_store:
-            self._version_store[str(path)] = []
-
-        self._version_store[str(path)].append({
+        self._version_store.setdefault(intern_path(path), []).append({
             'id': version.id,
             'timestamp': version.timestamp,
             'hash': version.hash,
@@ -426,10 +439,7 @@ class VersionManager(BaseTool):
 
     def _record_change(self, path: Path, change: ChangeInfo) -> None:
         """Record a change"""
-        if str(path) not in self._change_history:
-            self._change_history[str(path)] = []
-
-        self._change_history[str(path)].append({
+        self._change_history.setdefault(intern_path(path), []).append({
             'type': change.type,
             'timestamp': change.timestamp,
             'description': change.description,
@@ -471,10 +481,8 @@ class VersionManager(BaseTool):
 
     def _count_changes_by_type(self, changes: List[ChangeInfo]) -> Dict[str, int]:
         """Count changes by type"""
-        counts = {}
-        for change in changes:
-            counts[change.type] = counts.get(change.type, 0) + 1
-        return counts
+        # Counter tallies in C; a plain dict keeps the JSON output unchanged
+        return dict(Counter(change.type for change in changes))
 
     async def _cleanup_backup_directory(self) -> None:
         """Clean up backup directory"""